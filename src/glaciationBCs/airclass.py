@@ -2,12 +2,17 @@
 # parameterized analytical function for (cyclic) temperature evolution
 # Physical units: kg, m, s, K
 
+import functools
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 
 from math import pi, sin, cos, sinh, cosh, sqrt, exp
 
+# one air per parameter set, shared by all BCs using it
+@functools.lru_cache(maxsize=None)
+def shared_air(L_dom, T_north0, T_south0, T_rise, t_0, t_1, t_2=0, t_3=0, t_4=0):
+	return air(L_dom, T_north0, T_south0, T_rise, t_0, t_1, t_2, t_3, t_4)
+
+
 class air():
 	# class variables: owned by the class itself, shared by all instances of the class
 	pressure  = 0.e3 #Pa
@@ -26,25 +31,29 @@ class air():
 		self.t_2 = t_2
 		self.t_3 = t_3
 		self.t_4 = t_4
+		self.profile_t = None
+		self.profile_coeffs = None
 
 	def temperature(self):
 		return self.T_median
 	
-	# linear temperature profile from north to south
-	def temperature_profile(self, x, t):
-		if (     0.0 < t <= self.t_0):# pre-glacial surface temperature decrease
-			DT = self.T_drop * (1 - t / self.t_0)
-			T_north = self.T_north0 + DT
-			T_south = self.T_south0 + DT
-		if (self.t_0 < t <= self.t_2):# glacial surface temperature distribution
-			T_north = self.T_north0
-			T_south = self.T_south0
-		if (self.t_2 < t <= self.t_3):	# steadily rising surface temperature
+	# coefficients of the linear profile: (T_north, T_south), computed once per new t
+	def profile_coefficients(self, t):
+		if t == self.profile_t:
+			return self.profile_coeffs
+		if (t <= self.t_0):				# pre-glacial surface temperature decrease
+			DT = self.T_drop * (1 - max(t,0.0) / self.t_0) if self.t_0 > 0.0 else 0.0
+		elif (t <= self.t_2):			# glacial surface temperature distribution
+			DT = 0.0
+		elif (t <= self.t_3):			# steadily rising surface temperature
 			DT = self.T_rise * (t-self.t_2) / (self.t_3-self.t_2)
-			T_north = self.T_north0 + DT
-			T_south = self.T_south0 + DT
-		if (self.t_3 < t <= self.t_4):	# interglacial surface temperature distribution
-			T_north = self.T_north0 + self.T_rise
-			T_south = self.T_south0 + self.T_rise
+		else:							# interglacial surface temperature distribution
+			DT = self.T_rise
+		self.profile_t = t
+		self.profile_coeffs = (self.T_north0 + DT, self.T_south0 + DT)
+		return self.profile_coeffs
 
-		return T_north + (T_south-T_north) * (x/self.L_dom)
+	# linear temperature profile from north to south (x scalar or array)
+	def temperature_profile(self, x, t):
+		T_north, T_south = self.profile_coefficients(t)
+		return T_north + (T_south-T_north) * (np.asarray(x)/self.L_dom)
@@ -3,7 +3,6 @@
 # Physical units: kg, m, s, K
 
 import numpy as np
-import matplotlib.pyplot as plt
 import time_control_AREHS as tcr
 
 from constants_AREHS import s_a
@@ -12,18 +11,29 @@ class air():
 	# class variables: owned by the class itself, shared by all instances of the class
 	pressure  = 0.e3 #Pa
 	
-	def __init__(self, T_ini, T_min, t_):
+	# optional harmonics of a climate forcing: temperature anomaly in K
+	def __init__(self, T_ini, T_min, t_, harmonics=None):
 		# instance variables
 		self.T_ini = T_ini
 		self.T_min = T_min
 		
 		self.t_ = t_		
 		T_ = [T_ini, T_ini, T_min, T_min, T_min, T_min, T_ini]
-		self.tcr = tcr.time_control(t_, T_)
+		self.tcr = tcr.time_control(t_, T_, harmonics)
+		self.profile_t = None
+		self.profile_T = None
 	
-	# linear temperature profile from north to south
+	# uniform surface temperature, evaluated once per new t
 	def temperature(self, t):
-		return self.tcr.function_value(t)
+		if t != self.profile_t:
+			self.profile_t = t
+			self.profile_T = self.tcr.function_value(t) + self.tcr.time_modulation(t)
+		return self.profile_T
+
+	# temperature profile along the surface (x scalar or array)
+	def temperature_profile(self, x, t):
+		T = self.temperature(t)
+		return np.full(np.shape(x), T) if np.ndim(x) else T
 		
 	def plot_evolution(self):
 		self.tcr.plot_evolution()
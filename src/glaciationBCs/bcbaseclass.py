@@ -0,0 +1,136 @@
+# Base layer of the python BC classes for OpenGeoSys
+# Values at the boundary nodes and integration points are computed once per time step (batched or cached)
+# Physical units: depending on parameter set
+
+import functools
+import numpy as np
+
+
+class nodal_batch():
+	# mixin for Dirichlet BCs (put before the OpenGeoSys base class):
+	# subclasses implement values(t, x, y, z) for arrays of node coordinates,
+	# returning the prescribed values as an array of the same shape
+
+	def __init__(self):
+		super().__init__()
+		# node registry learned from the calls: node_id -> coords
+		self.registry = {}
+		self.batch_t = None
+		self.batch_index = {}	# node_id -> position in the batch
+		self.batch_values = []
+
+	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
+		if t != self.batch_t:
+			self.precompute(t)
+		i = self.batch_index.get(node_id)
+		if i is None:
+			# node not registered yet (first time step): evaluate on its own
+			self.registry[node_id] = tuple(coords)
+			x, y, z = (np.array([c], dtype=float) for c in coords)
+			return (True, float(self.values(t, x, y, z)[0]))
+		return (True, self.batch_values[i])
+
+	# values for all registered nodes at once, served as plain floats
+	def precompute(self, t):
+		self.batch_t = t
+		if len(self.registry) != len(self.batch_index):
+			self.batch_index = {node_id: i for i, node_id in enumerate(self.registry)}
+			self.batch_coords = np.array(list(self.registry.values()), dtype=float).reshape(-1, 3)
+		if len(self.batch_index) == 0:
+			return
+		x, y, z = self.batch_coords.T
+		self.batch_values = np.broadcast_to(self.values(t, x, y, z), x.shape).tolist()
+
+
+class nodal_cache():
+	# mixin for Dirichlet BCs (put before the OpenGeoSys base class):
+	# BCs declaring depends_on_primary_vars = False get their getDirichletBCValue
+	# cached per (t, node_id), i.e. evaluated once per time step and not in every
+	# nonlinear iteration; the cache is flushed when t changes
+	depends_on_primary_vars = True
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		if not cls.depends_on_primary_vars and 'getDirichletBCValue' in cls.__dict__:
+			cls.getDirichletBCValue = cached_by_node(cls.__dict__['getDirichletBCValue'])
+
+
+def cached_by_node(getDirichletBCValue):
+	@functools.wraps(getDirichletBCValue)
+	def cached(self, t, coords, node_id, primary_vars):
+		if t != self.__dict__.get('cache_t'):
+			self.cache_t = t
+			self.cache = {}
+		result = self.cache.get(node_id)
+		if result is None:
+			result = getDirichletBCValue(self, t, coords, node_id, primary_vars)
+			self.cache[node_id] = result
+		return result
+	return cached
+
+
+class flux_batch():
+	# mixin for Neumann BCs and source terms (put before the OpenGeoSys base class):
+	# getFlux receives integration points without node id, so they are keyed on their
+	# coordinates quantized to flux_resolution; subclasses implement fluxes(t, x, y, z)
+	# for arrays of points, returning (active, values) for BCs and values for source terms
+	flux_resolution = 1.e-3	# m
+	flux_derivative = [0.0, 0.0]
+	source_term = False		# getFlux returns (value, derivative) instead of (active, value, derivative)
+	register_points = True	# learn the points for a batch evaluation per time step, else cache only
+
+	def __init__(self):
+		super().__init__()
+		self.point_registry = {}	# quantized coords -> coords
+		self.flux_t = None
+		self.flux_index = {}		# quantized coords -> position in the batch
+		self.flux_results = []
+		self.flux_cache = {}		# quantized coords -> result of points outside the batch
+
+	def getFlux(self, t, coords, primary_vars):
+		if t != self.flux_t:
+			self.precompute_fluxes(t)
+		q = self.flux_resolution
+		key = (round(coords[0]/q), round(coords[1]/q), round(coords[2]/q))
+		i = self.flux_index.get(key)
+		if i is not None:
+			return self.flux_results[i]
+		result = self.flux_cache.get(key)
+		if result is None:
+			# point not registered yet (first time step): evaluate on its own
+			if self.register_points:
+				self.point_registry[key] = tuple(coords)
+			x, y, z = (np.array([c], dtype=float) for c in coords)
+			result = self.flux_tuples(self.fluxes(t, x, y, z), x.shape)[0]
+			self.flux_cache[key] = result
+		return result
+
+	# fluxes for all registered points at once, served as tuples of plain floats
+	def precompute_fluxes(self, t):
+		self.flux_t = t
+		self.flux_cache = {}
+		if len(self.point_registry) != len(self.flux_index):
+			self.flux_index = {key: i for i, key in enumerate(self.point_registry)}
+			self.flux_coords = np.array(list(self.point_registry.values()), dtype=float).reshape(-1, 3)
+			self.flux_points = tuple(self.flux_coords.T)
+			self.points_registered()
+		if len(self.flux_index) == 0:
+			return
+		self.flux_results = self.flux_tuples(self.batch_fluxes(t), (len(self.flux_index),))
+
+	# hook for subclasses: point data that does not change in time (e.g. zone ids),
+	# prepared once the registered points change
+	def points_registered(self):
+		pass
+
+	# fluxes at the registered points flux_points = (x, y, z)
+	def batch_fluxes(self, t):
+		return self.fluxes(t, *self.flux_points)
+
+	def flux_tuples(self, fluxes, shape):
+		derivative = self.flux_derivative
+		if self.source_term:
+			return [(value, derivative) for value in np.broadcast_to(fluxes, shape).tolist()]
+		active, values = fluxes
+		return [(a, value, derivative) for a, value in 
+				zip(np.broadcast_to(active, shape).tolist(), np.broadcast_to(values, shape).tolist())]
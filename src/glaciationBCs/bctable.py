@@ -0,0 +1,150 @@
+# Offline BC tables: all BC values of a scenario (fixed mesh and time grid) evaluated once
+# into a memory-mapped table (time x node), replayed with linear interpolation in time
+# files: <prefix>_values.npy, <prefix>_times.npy, <prefix>_coords.npy,
+# <prefix>_nodes.npy (OGS node ids, empty when exported without ids),
+# <prefix>_derivative.npy (flux derivative as returned by the BC, empty for Dirichlet BCs)
+# inactive BC values (no BC at this point and time) are stored as NaN
+
+import types
+import numpy as np
+
+
+# values of a BC object at all points for time t (vectorized where the BC supports it)
+def evaluate(bc, t, coords, node_ids):
+	x, y, z = coords.T
+	if hasattr(bc, 'values'):		# nodal batch BCs
+		return np.broadcast_to(bc.values(t, x, y, z), x.shape)
+	if hasattr(bc, 'fluxes'):		# flux batch BCs and source terms
+		fluxes = bc.fluxes(t, x, y, z)
+		if bc.source_term:
+			return np.broadcast_to(fluxes, x.shape)
+		active, values = fluxes
+		return np.where(active, values, np.nan)
+	# other BCs: point by point through their OGS callback
+	if isinstance(getattr(type(bc), 'getDirichletBCValue', None), types.FunctionType):
+		results = [bc.getDirichletBCValue(t, tuple(c), i, []) for c, i in zip(coords.tolist(), node_ids.tolist())]
+	else:
+		results = [bc.getFlux(t, tuple(c), []) for c in coords.tolist()]
+	return np.array([result_value(r) for r in results], dtype=float)
+
+# (active, value[, derivative]) of BCs, (value, derivative) of source terms
+def result_value(result):
+	if isinstance(result[0], bool):
+		return result[1] if result[0] else np.nan
+	return result[0]
+
+# derivative w.r.t. the primary variables from a getFlux result of the BC (constant in the
+# BCs of this package), its length is the number of primary variables of the process
+def flux_derivative(bc, t, coords):
+	if not isinstance(getattr(type(bc), 'getFlux', None), types.FunctionType) or len(coords) == 0:
+		return []
+	return list(bc.getFlux(t, tuple(coords[0].tolist()), [])[-1])
+
+
+# without node_ids the table is replayed by coordinates only
+def export_table(bc, prefix, times, coords, node_ids=None):
+	times = np.asarray(times, dtype=float)
+	coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+	exported_ids = np.zeros(0, dtype=int) if node_ids is None else np.asarray(node_ids, dtype=int)
+	# ids for the evaluation of BCs caching per node id
+	node_ids = np.arange(len(coords)) if node_ids is None else exported_ids
+	if np.any(np.diff(times) <= 0):
+		raise ValueError("table times must be strictly increasing")
+	table = np.lib.format.open_memmap(prefix + '_values.npy', mode='w+', dtype=float,
+									  shape=(len(times), len(coords)))
+	for k, t in enumerate(times.tolist()):
+		table[k] = evaluate(bc, t, coords, node_ids)
+	table.flush()
+	np.save(prefix + '_derivative.npy', np.array(flux_derivative(bc, times[0], coords), dtype=float))
+	np.save(prefix + '_times.npy', times)
+	np.save(prefix + '_coords.npy', coords)
+	np.save(prefix + '_nodes.npy', exported_ids)
+	return table
+
+
+class replay():
+	# mixin serving getDirichletBCValue/getFlux from an exported table (put before the
+	# OpenGeoSys base class): nodes by node_id (if exported), other points by their
+	# quantized coords, points not in the table (e.g. integration points of Neumann BCs
+	# and source terms) are interpolated linearly between the two nearest table points
+	flux_resolution = 1.e-3	# m
+
+	def __init__(self, prefix, source_term=False):
+		super().__init__()
+		self.table = np.load(prefix + '_values.npy', mmap_mode='r')
+		self.times = np.load(prefix + '_times.npy').tolist()
+		self.coords = np.load(prefix + '_coords.npy')
+		self.node_index = {node_id: i for i, node_id in enumerate(np.load(prefix + '_nodes.npy').tolist())}
+		q = self.flux_resolution
+		self.point_index = {(round(x/q), round(y/q), round(z/q)): i for i, (x, y, z) in enumerate(self.coords.tolist())}
+		self.point_cache = {}	# quantized coords -> (i, j, w), the mesh does not move
+		self.source_term = source_term
+		self.derivative = np.load(prefix + '_derivative.npy').tolist()
+		self.row_t = None
+		self.row_values = []
+
+	# table row linearly interpolated at t (held constant outside the time range), once per t
+	# where the BC is inactive at one end of the interval the nearer row is taken
+	def row(self, t):
+		if t != self.row_t:
+			times = self.times
+			if len(times) == 1 or t <= times[0]:
+				values = self.table[0]
+			elif t >= times[-1]:
+				values = self.table[-1]
+			else:
+				k = int(np.searchsorted(times, t, side='right')) - 1
+				w = (t - times[k]) / (times[k+1] - times[k])
+				before, after = self.table[k], self.table[k+1]
+				values = np.where(np.isnan(before) | np.isnan(after),
+								  before if w < 0.5 else after, (1-w)*before + w*after)
+			self.row_t = t
+			self.row_values = np.asarray(values, dtype=float).tolist()
+		return self.row_values
+
+	# table points (i, j) and weight w of a point
+	def point(self, coords):
+		q = self.flux_resolution
+		key = (round(coords[0]/q), round(coords[1]/q), round(coords[2]/q))
+		p = self.point_cache.get(key)
+		if p is None:
+			i = self.point_index.get(key)
+			p = (i, i, 0.0) if i is not None else self.segment(coords)
+			self.point_cache[key] = p
+		return p
+
+	# nearest two table points and the position of the point projected onto their segment
+	def segment(self, coords):
+		d = self.coords - np.asarray(coords, dtype=float)
+		dist = np.einsum('ij,ij->i', d, d)
+		if len(dist) < 2:
+			return (0, 0, 0.0)
+		i, j = sorted(np.argpartition(dist, 1)[:2].tolist(), key=lambda k: dist[k])
+		ab = self.coords[j] - self.coords[i]
+		length2 = float(ab @ ab)
+		w = min(max(float(-d[i] @ ab) / length2, 0.0), 1.0) if length2 > 0 else 0.0
+		return (i, j, w)
+
+	# value at a point at t, where the BC is inactive at one end the nearer point is taken
+	def value(self, t, p):
+		values = self.row(t)
+		i, j, w = p
+		a, b = values[i], values[j]
+		if w == 0.0 or a != a or b != b:
+			return a if w < 0.5 else b
+		return (1-w)*a + w*b
+
+	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
+		i = self.node_index.get(node_id)
+		value = self.value(t, self.point(coords) if i is None else (i, i, 0.0))
+		if value != value:	# NaN: no BC
+			return (False, 0.0)
+		return (True, value)
+
+	def getFlux(self, t, coords, primary_vars):
+		value = self.value(t, self.point(coords))
+		if self.source_term:
+			return (0.0 if value != value else value, self.derivative)
+		if value != value:
+			return (False, 0.0, self.derivative)
+		return (True, value, self.derivative)
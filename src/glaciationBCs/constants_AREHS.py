@@ -36,6 +36,11 @@ t_5 = t_4 + 30000 * s_a #s
 t_6 = t_5 + 10000 * s_a #s
 t_ = [t_0, t_1, t_2, t_3, t_4, t_5, t_6]
 
+# Optional: orbital climate forcing as harmonics [(amplitude, period, phase), ...]
+# e.g. [(1.0, 41000*s_a, 0.0), (0.5, 23000*s_a, 1.0)], None for no forcing
+harmonics_T = None	# air temperature anomaly in K
+harmonics_H = None	# relative modulation of the ice volume
+
 # Radioactive waste (Jobmann et al., 2017 - Projekt Ansicht):
 # Parameters RK-BE
 BE_Q = [842.65, 1269.66, 3895.17, 8308.18, 42363.74]	# W/m³
@@ -64,3 +69,18 @@ t_filled = 80*s_a
 # settings / set up
 # flag for 2D / 3D
 plotinput = False
+# Optional: path to gridded crust data (ux.dat, uy.dat, qgeo.dat), None for constants
+path2data = None
+# Optional: file of emplacement zones (rows: xmin xmax ymin ymax), None for the single zone xrmin..yrmax
+path2zones = None
+# Optional: file of the canister inventory (rows: emplacement time [a], waste class, zone id, volume [m³])
+# emplacement times in years from the start of the filling (model time t = 0 is t_filled later)
+# None for the stepwise filling of the repository model, waste classes refer to:
+path2inventory = None
+waste_classes = [(BE_Q, BE_z, BE_f, t_inter_BE), (HA_Q, HA_z, HA_f, t_inter_HA)]
+# Optional: serve BCs from offline tables exported by tools/export_bc_table.py
+# {bc name: table prefix}, e.g. {'bc_T_dgrepo_inside_VolSource': 'tables/repo'}
+replay_tables = {}
+# repository source averaged over each time step (mean of the scaled source, as OGS integrates it) instead of the value at t
+averaged_source = False
+t_start = 0.0	# s, model start time: the first step is averaged over [t_start, t]
@@ -3,10 +3,14 @@
 # Physical units: kg, m, s, K
 
 import copy as cp
+import os
+import atexit
+import contextlib
+import hashlib
+import tempfile
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import functools
+import itertools
 
 from math import pi, sin, cos, sinh, cosh, sqrt, exp
 
@@ -33,6 +37,7 @@ def index_list_Xfixed(x, xvals):
     return index_list
 
 def setup_lineplot_uxuy(coord, value):
+	import matplotlib.pyplot as plt
 	fig, ax = plt.subplots(ncols=2,figsize=(24,6))
 	ax[0].set_title('Horizont displacement for ' + coord + "=%.0f"%(value))
 	ax[1].set_title('Vertical displacement for ' + coord + "=%.0f"%(value))
@@ -42,17 +47,335 @@ def setup_lineplot_uxuy(coord, value):
 	    ax[i].grid()
 	return ax
 
+# header of a GIA file: x y t_0 t_1 ... (times in ka)
+def read_GIA_header(filename):
+	with open(os.path.expanduser(filename)) as f:
+		return f.readline().split()
+
+# header shared by ux.dat and uy.dat, both must have the same columns and times
+def read_GIA_headers(datapath='data/'):
+	header = read_GIA_header(datapath + 'ux.dat')
+	uy_header = read_GIA_header(datapath + 'uy.dat')
+	if (len(header) != len(uy_header)) or (header[:2] != uy_header[:2]) or \
+	   not np.array_equal(np.array(header[2:], dtype=float), np.array(uy_header[2:], dtype=float)):
+		raise ValueError("GIA files ux.dat and uy.dat in " + datapath + " have different headers")
+	return header
+
+# number of data rows below the header
+def count_GIA_rows(filename):
+	with open(os.path.expanduser(filename), 'rb') as f:
+		return sum(1 for line in f if line.strip()) - 1
+
+# compiled (C) whitespace parser for the numeric block below the header,
+# in chunks of rows handed to store(first row, rows) (peak memory: one chunk)
+def parse_GIA_file(filename, store, ncols, chunk=2048):
+	with open(os.path.expanduser(filename)) as f:
+		f.readline()
+		i = 0
+		while True:
+			lines = list(itertools.islice(f, chunk))
+			if not lines:
+				return i
+			rows = np.loadtxt(lines, dtype=float, ndmin=2)
+			if rows.shape[1] != ncols:
+				raise ValueError("GIA file " + filename + " does not match its header")
+			store(i, rows)
+			i += len(rows)
+
+# parse ux.dat and uy.dat (one after the other: the parser holds the GIL),
+# the coordinate columns of both files must match
+def read_GIA_tables(datapath='data/'):
+	header = read_GIA_headers(datapath)
+	tables = []
+	for name in ['ux.dat', 'uy.dat']:
+		table = np.empty((count_GIA_rows(datapath + name), len(header)))
+		def store(i, rows, table=table):
+			table[i:i+len(rows)] = rows
+		if parse_GIA_file(datapath + name, store, len(header)) != len(table):
+			raise ValueError("GIA file " + datapath + name + " has inconsistent rows")
+		tables.append(table)
+	ux_table, uy_table = tables
+	if (ux_table.shape != uy_table.shape) or not np.array_equal(ux_table[:,0:2], uy_table[:,0:2]):
+		raise ValueError("GIA files ux.dat and uy.dat in " + datapath + " have different coordinates")
+	return header, ux_table, uy_table
+
 # read external field data from GIA (Glacier Isostatic Adjustment)
-def read_data_GIA(datapath='data/'):
-	ux_data = pd.read_csv(datapath + 'ux.dat', sep=r'\s{1,}', engine='python')
-	uy_data = pd.read_csv(datapath + 'uy.dat', sep=r'\s{1,}', engine='python')
-	tSeries = pd.read_csv(datapath + 'ux.dat', sep=r'\s{1,}', engine='python', 
-			  header=None, nrows=1, usecols=range(2,68))
-	ux_data.info()
-	uy_data.info()
-	tSeries.info()
+def read_data_GIA(datapath='data/', info=True):
+	import pandas as pd
+	header, ux_table, uy_table = read_GIA_tables(datapath)
+	ux_data = pd.DataFrame(ux_table, columns=header)
+	uy_data = pd.DataFrame(uy_table, columns=header)
+	tSeries = pd.DataFrame([[float(t) for t in header[2:]]], columns=range(2,len(header)))
+	if info:
+		ux_data.info()
+		uy_data.info()
+		tSeries.info()
 	return ux_data, uy_data, tSeries
 
+# read external field data from GIA as dense arrays, displacements as (time x point),
+# parsed chunkwise straight into the preallocated arrays
+def read_GIA_arrays(datapath='data/', dtype=np.float32):
+	header = read_GIA_headers(datapath)
+	npoints = count_GIA_rows(datapath + 'ux.dat')
+	arrays = {'xvalues': np.empty(npoints),
+			  'yvalues': np.empty(npoints),
+			  'tvalues': np.array(header[2:], dtype=float),
+			  'ux_values': np.empty((len(header)-2, npoints), dtype=dtype),
+			  'uy_values': np.empty((len(header)-2, npoints), dtype=dtype)}
+	def store_ux(i, rows):
+		arrays['xvalues'][i:i+len(rows)] = rows[:,0]
+		arrays['yvalues'][i:i+len(rows)] = rows[:,1]
+		arrays['ux_values'][:,i:i+len(rows)] = rows[:,2:].T
+	def store_uy(i, rows):
+		if not (np.array_equal(arrays['xvalues'][i:i+len(rows)], rows[:,0]) and 
+				np.array_equal(arrays['yvalues'][i:i+len(rows)], rows[:,1])):
+			raise ValueError("GIA files ux.dat and uy.dat in " + datapath + " have different coordinates")
+		arrays['uy_values'][:,i:i+len(rows)] = rows[:,2:].T
+	if count_GIA_rows(datapath + 'uy.dat') != npoints:
+		raise ValueError("GIA files ux.dat and uy.dat in " + datapath + " have different numbers of points")
+	parse_GIA_file(datapath + 'ux.dat', store_ux, len(header))
+	parse_GIA_file(datapath + 'uy.dat', store_uy, len(header))
+	return arrays
+
+# slopes of the monotone piecewise cubic Hermite interpolation (Fritsch-Carlson, as PCHIP)
+# along the time axis of values (time x point)
+def pchip_slopes(tvalues, values, dtype=None):
+	values = np.asarray(values, dtype=float)
+	h = np.diff(tvalues)[:,None]
+	delta = np.diff(values, axis=0) / h
+	slopes = np.zeros(values.shape)
+	if len(tvalues) < 3:
+		slopes[:] = delta[0]
+		return slopes.astype(dtype or values.dtype)
+	# interior points: weighted harmonic mean, zero at local extrema
+	w1 = 2*h[1:] + h[:-1]
+	w2 = h[1:] + 2*h[:-1]
+	same_sign = (delta[:-1]*delta[1:]) > 0
+	with np.errstate(divide='ignore', invalid='ignore'):
+		harmonic = (w1+w2) / (w1/delta[:-1] + w2/delta[1:])
+	slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+	# end points: shape preserving three-point formula
+	for k, d0, d1, h0, h1 in [(0, delta[0], delta[1], h[0], h[1]), (-1, delta[-1], delta[-2], h[-1], h[-2])]:
+		d = ((2*h0+h1)*d0 - h0*d1) / (h0+h1)
+		d = np.where(np.sign(d) != np.sign(d0), 0.0, d)
+		d = np.where((np.sign(d0) != np.sign(d1)) & (np.abs(d) > 3*np.abs(d0)), 3*d0, d)
+		slopes[k] = d
+	return slopes.astype(dtype or values.dtype)
+
+# time slopes for the cubic time interpolation of dense GIA arrays
+def add_GIA_slopes(arrays):
+	for name in ['ux', 'uy']:
+		arrays[name + '_slopes'] = pchip_slopes(arrays['tvalues'], arrays[name + '_values'], 
+												arrays[name + '_values'].dtype)
+	return arrays
+
+# reduced-order representation: truncated SVD u = coeffs @ modes.T per component with
+# the fewest modes whose discarded energy (sum of squared singular values) is <= tol
+def reduce_GIA_arrays(arrays, tol, cubic=False):
+	for name in ['ux', 'uy']:
+		values = np.asarray(arrays.pop(name + '_values'), dtype=float)
+		U, S, Vt = np.linalg.svd(values, full_matrices=False)
+		energy = np.cumsum(S**2)
+		k = int(np.searchsorted(energy, (1-tol) * energy[-1])) + 1
+		k = min(k, len(S))
+		arrays[name + '_coeffs'] = U[:,:k] * S[:k]				# time x mode
+		arrays[name + '_modes'] = np.ascontiguousarray(Vt[:k].T)	# point x mode
+		if cubic:
+			arrays[name + '_dcoeffs'] = pchip_slopes(arrays['tvalues'], arrays[name + '_coeffs'])
+	return arrays
+
+# deflection rate duy/dt (m/ka) as centered differences in time on the (t,y,x) grid
+# (one-sided at the first and last time point)
+def deflection_rates(tvalues, uy_values, dtype=None):
+	uy_values = np.asarray(uy_values, dtype=float)
+	return np.gradient(uy_values, tvalues, axis=0).astype(dtype or uy_values.dtype)
+
+# dense GIA arrays as used by the array storage modes of crust
+def prepare_GIA_arrays(datapath='data/', cubic=False, reduced=None, rates=False):
+	if reduced is not None:
+		arrays = reduce_GIA_arrays(read_GIA_arrays(datapath, dtype=float), reduced, cubic)
+		if rates: # the rates of the reduced field are the rates of its coefficients
+			arrays['uy_vcoeffs'] = deflection_rates(arrays['tvalues'], arrays['uy_coeffs'])
+		return arrays
+	arrays = read_GIA_arrays(datapath)
+	if cubic:
+		add_GIA_slopes(arrays)
+	if rates:
+		arrays['vy_values'] = deflection_rates(arrays['tvalues'], arrays['uy_values'], arrays['uy_values'].dtype)
+	return arrays
+
+# key identifying a GIA data set on disk (path, size and modification time)
+def dataset_key(datapath):
+	h = hashlib.sha1()
+	for name in ['ux.dat', 'uy.dat']:
+		filename = os.path.abspath(os.path.expanduser(datapath + name))
+		stat = os.stat(filename)
+		h.update(("%s:%d:%d;" % (filename, stat.st_size, stat.st_mtime_ns)).encode())
+	return h.hexdigest()[:16]
+
+
+# Read-only arrays shared by all processes of a host (e.g. MPI ranks):
+# the first process publishes them as memory-mapped .npy files in shared memory,
+# all others attach zero-copy. The attached processes are reference counted,
+# the last one to release removes the files.
+class shared_arrays():
+
+	def __init__(self, key, load):
+		base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+		self.path = os.path.join(base, 'glaciationBCs_' + key)
+		# one lock file for all data sets: removing per key lock files would race
+		# with processes still waiting on them
+		self.lockfile = os.path.join(base, 'glaciationBCs.lock')
+		self.arrays = {}
+		with self.locked():
+			users = self.read_users()
+			if not os.path.exists(os.path.join(self.path, 'ready')):
+				os.makedirs(self.path, exist_ok=True)
+				names = []
+				for name, array in load().items():
+					m = np.lib.format.open_memmap(os.path.join(self.path, name + '.npy'), mode='w+', 
+												  dtype=array.dtype, shape=array.shape)
+					m[...] = array
+					m.flush()
+					del m
+					names.append(name)
+				with open(os.path.join(self.path, 'ready'), 'w') as f:
+					f.write('\n'.join(names))
+			with open(os.path.join(self.path, 'ready')) as f:
+				names = f.read().split()
+			for name in names:
+				self.arrays[name] = np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+			self.write_users(users | {os.getpid()})
+		atexit.register(self.release)
+
+	# exclusive lock between the processes of the host (the single empty lock file stays)
+	@contextlib.contextmanager
+	def locked(self):
+		import fcntl
+		with open(self.lockfile, 'a') as f:
+			fcntl.flock(f, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				fcntl.flock(f, fcntl.LOCK_UN)
+
+	# pids of the attached processes, dead ones (e.g. after a crash) are dropped
+	def read_users(self):
+		try:
+			with open(os.path.join(self.path, 'users')) as f:
+				pids = {int(pid) for pid in f.read().split()}
+		except FileNotFoundError:
+			return set()
+		alive = set()
+		for pid in pids:
+			try:
+				os.kill(pid, 0)
+				alive.add(pid)
+			except ProcessLookupError:
+				pass
+			except PermissionError:
+				alive.add(pid)
+		return alive
+
+	def write_users(self, pids):
+		with open(os.path.join(self.path, 'users'), 'w') as f:
+			f.write('\n'.join(str(pid) for pid in sorted(pids)))
+
+	def release(self):
+		if not self.arrays:
+			return
+		self.arrays = {}
+		with self.locked():
+			if not os.path.isdir(self.path):
+				return
+			users = self.read_users() - {os.getpid()}
+			if users:
+				self.write_users(users)
+			else:
+				for name in os.listdir(self.path):
+					os.remove(os.path.join(self.path, name))
+				os.rmdir(self.path)
+
+
+# Paired evaluation of both displacement components on one boundary:
+# the first component BC asking for a point set at time t computes (ux, uy) at once,
+# the partner BC reads the other component for the same points (scalars or arrays)
+class displacement_pair():
+	
+	def __init__(self, interpolate):
+		self.interpolate = interpolate
+		self.t = None
+		self.memo = {} # points -> (ux, uy) at t
+
+	def component(self, i, x, y, t):
+		if (t != self.t):
+			self.t = t
+			self.memo = {}
+		if np.ndim(x) or np.ndim(y):
+			key = (np.asarray(x, dtype=float).tobytes(), np.asarray(y, dtype=float).tobytes())
+		else:
+			key = (x, y)
+		u = self.memo.get(key)
+		if u is None:
+			u = self.interpolate(x, y, t)
+			self.memo[key] = u
+		return u[i]
+
+
+# Rectilinear grid behind the point list of a GIA data set (bilinear interpolation)
+class grid2D():
+
+	def __init__(self, xvals, yvals):
+		self.xaxis = np.unique(xvals)
+		self.yaxis = np.unique(yvals)
+		# data point index for each grid node
+		self.node_point = np.full((len(self.yaxis), len(self.xaxis)), -1)
+		self.node_point[np.searchsorted(self.yaxis, yvals), 
+						np.searchsorted(self.xaxis, xvals)] = np.arange(len(xvals))
+		if (self.node_point < 0).any():
+			raise ValueError("GIA data points do not form a complete rectilinear grid")
+		self.extent = (self.xaxis[0], self.xaxis[-1], self.yaxis[0], self.yaxis[-1])
+		self.cellsize = (np.diff(self.xaxis).mean() if len(self.xaxis) > 1 else np.inf) * \
+						(np.diff(self.yaxis).mean() if len(self.yaxis) > 1 else np.inf)
+		self.cells = {} # (x,y) -> (corners, weights)
+
+	def contains(self, x, y):
+		return (self.extent[0] <= x) & (x <= self.extent[1]) & \
+			   (self.extent[2] <= y) & (y <= self.extent[3])
+
+	# lower cell index and weight along one axis (clamped to the axis range)
+	def locate_axis(self, axis, s):
+		n = len(axis)
+		i = np.clip(np.searchsorted(axis, s, side='right') - 1, 0, max(n-2, 0))
+		i2 = np.minimum(i+1, n-1)
+		ds = axis[i2] - axis[i]
+		w = np.clip(np.divide(s - axis[i], ds, out=np.zeros_like(s), where=ds>0), 0.0, 1.0)
+		return i, i2, w
+
+	# data point indices of the cell corners and bilinear weights, shape (n,4)
+	def locate(self, x, y):
+		x = np.atleast_1d(np.asarray(x, dtype=float))
+		y = np.atleast_1d(np.asarray(y, dtype=float))
+		ix, ix2, wx = self.locate_axis(self.xaxis, x)
+		iy, iy2, wy = self.locate_axis(self.yaxis, y)
+		corners = np.stack([self.node_point[iy,ix],  self.node_point[iy,ix2], 
+							self.node_point[iy2,ix], self.node_point[iy2,ix2]], axis=-1)
+		weights = np.stack([(1-wx)*(1-wy), wx*(1-wy), (1-wx)*wy, wx*wy], axis=-1)
+		return corners, weights
+
+	# vectorized for arrays, for single points the cell index and weights are
+	# computed once and cached (the mesh does not move)
+	def interpolate(self, values, x, y):
+		if np.ndim(x) or np.ndim(y):
+			corners, weights = self.locate(x, y)
+			return (values[corners] * weights).sum(axis=-1)
+		cell = self.cells.get((x, y))
+		if cell is None:
+			corners, weights = self.locate(x, y)
+			cell = (corners[0], weights[0])
+			self.cells[(x, y)] = cell
+		return float(values[cell[0]] @ cell[1])
+
 
 class crust():
 	# class variables:
@@ -60,16 +383,49 @@ class crust():
 	# TODO members: vertical/horizontal_boundary -> boundary.ux
 		
 	# constructor
-	def __init__(self, datapath='data/'):
+	# compact=True keeps the displacements as contiguous float32 arrays (time x point)
+	# instead of the pandas DataFrames, the coordinates are stored only once
+	# shared=True additionally shares these arrays between all processes of the host
+	# cubic=True interpolates in time with monotone cubic Hermite polynomials instead of
+	# linearly, the slopes are precomputed at load => coarser time sampling of the data
+	# reduced=tol replaces the fields by a truncated SVD (spatial modes and time
+	# coefficients) keeping all but the fraction tol of the energy
+	# rates=True precomputes the deflection rates duy/dt for the hydraulic source term
+	def __init__(self, datapath='data/', compact=False, shared=False, cubic=False, reduced=None, rates=False):
 		# instance variables: owned by instances of the class, can be different for each instance
 		self.datapath = datapath
-		self.ux_data = pd.read_csv(self.datapath + 'ux.dat', sep=r'\s{1,}', engine='python')
-		self.uy_data = pd.read_csv(self.datapath + 'uy.dat', sep=r'\s{1,}', engine='python')
-		self.tSeries = pd.read_csv(self.datapath + 'uy.dat', sep=r'\s{1,}', engine='python', 
-				  header=None, nrows=1, usecols=range(2,68))
-		self.xvalues = self.ux_data.x[0:].to_numpy(dtype=float)
-		self.yvalues = self.uy_data.y[0:].to_numpy(dtype=float)
-		self.tvalues = self.tSeries.to_numpy(dtype=float)[0,:]
+		self.compact = compact or shared or (reduced is not None)
+		self.cubic = cubic
+		self.reduced = reduced
+		self.rates = rates
+		self.shared = None
+		if shared:
+			key = dataset_key(datapath) + ('c' if cubic else '') + ('v' if rates else '') + \
+				  ('r%g' % reduced if reduced is not None else '')
+			self.shared = shared_arrays(key, lambda: prepare_GIA_arrays(datapath, cubic, reduced, rates))
+			arrays = self.shared.arrays
+		elif self.compact:
+			arrays = prepare_GIA_arrays(datapath, cubic, reduced, rates)
+		if self.compact:
+			# xvalues, yvalues, tvalues and per component either
+			# ux_values (+ ux_slopes): row i holds the field at time tvalues[i]
+			# or ux_modes, ux_coeffs (+ ux_dcoeffs) for the reduced representation
+			# (+ vy_values or uy_vcoeffs for the deflection rates)
+			for name, array in arrays.items():
+				setattr(self, name, array)
+			self.ux_data = None
+			self.uy_data = None
+			self.tSeries = None
+		else:
+			self.ux_data, self.uy_data, self.tSeries = read_data_GIA(self.datapath, info=False)
+			self.xvalues = self.ux_data.x[0:].to_numpy(dtype=float)
+			self.yvalues = self.uy_data.y[0:].to_numpy(dtype=float)
+			self.tvalues = self.tSeries.to_numpy(dtype=float)[0,:]
+			if cubic:
+				self.ux_slopes = pchip_slopes(self.tvalues, self.ux_data.iloc[:,2:].to_numpy(dtype=float).T)
+				self.uy_slopes = pchip_slopes(self.tvalues, self.uy_data.iloc[:,2:].to_numpy(dtype=float).T)
+			if rates:
+				self.vy_values = deflection_rates(self.tvalues, self.uy_data.iloc[:,2:].to_numpy(dtype=float).T)
 		
 		self.xmin = self.xvalues.min()
 		self.xmax = self.xvalues.max()
@@ -77,14 +433,27 @@ class crust():
 		self.ymin = self.yvalues.min()
 		self.ymax = self.yvalues.max()
 		self.depth = self.ymax - self.ymin
-		self.idLst_vertical = index_list_Xfixed(x=1150000, xvals= self.xvalues)
-		self.idRng_horizont = index_range_Yfixed(y=-7500,  yvals= self.yvalues)
-		#self.idRng_horizont = index_range_yfixed(3, self.Nx)
-		# TODO get numbers automatically
-		self.Nx = 231 # from 0 to 230
-		self.Ny = 19  # from 0 to 18
+		self.grid = grid2D(self.xvalues, self.yvalues)
+		self.Nx = len(self.grid.xaxis) # 231 from 0 to 230
+		self.Ny = len(self.grid.yaxis) # 19  from 0 to 18
 		self.dt = 0.5 #ka
 		self.dx = 5000 #m
+		# boundary lines with time interpolated profiles (cached per t)
+		# (nested fine grids may not contain these lines)
+		self.boundaries = {}
+		self.profiles = {}
+		self.field_cache = None
+		self.rate_cache = None
+		self.idLst_vertical = index_list_Xfixed(x=1150000, xvals= self.xvalues)
+		if (len(self.idLst_vertical) > 0):
+			self.register_boundary('lateral', self.idLst_vertical, self.yvalues)
+		if (self.yvalues == -7500).any():
+			self.idRng_horizont = index_range_Yfixed(y=-7500,  yvals= self.yvalues)
+			#self.idRng_horizont = index_range_yfixed(3, self.Nx)
+			self.register_boundary('bottom', slice(self.idRng_horizont[0], self.idRng_horizont[1]+1), self.xvalues)
+		# component BCs of the same boundary share one interpolation per point
+		self.bottom  = displacement_pair(self.interpolateX_data_uxuy)
+		self.lateral = displacement_pair(self.interpolateY_data_uxuy)
 	
 	def geothermal_heatflux():
 		#TODO
@@ -93,18 +462,62 @@ class crust():
 	def dy(self,y):
 		if (y > -30000.0): return 2500.0
 		else: 			   return 10000.0
+
+	# displacements (ux, uy) at time index it for the selected points idx
+	# only the selection is copied, never the full column
+	def displacement_column(self, it, idx=slice(None)):
+		if self.reduced is not None:
+			return (self.ux_modes[idx] @ self.ux_coeffs[it], 
+					self.uy_modes[idx] @ self.uy_coeffs[it])
+		if self.compact:
+			return (self.ux_values[it,idx].astype(float), 
+					self.uy_values[it,idx].astype(float))
+		return (self.ux_data.iloc[idx,it+2].to_numpy(dtype=float), 
+				self.uy_data.iloc[idx,it+2].to_numpy(dtype=float))
+
+	# time slopes (dux/dt, duy/dt) at time index it for the selected points idx (cubic only)
+	def slope_column(self, it, idx=slice(None)):
+		if self.reduced is not None:
+			return (self.ux_modes[idx] @ self.ux_dcoeffs[it], 
+					self.uy_modes[idx] @ self.uy_dcoeffs[it])
+		return (self.ux_slopes[it,idx].astype(float), 
+				self.uy_slopes[it,idx].astype(float))
+
+	# deflection rates duy/dt at time index it for the selected points idx (rates only)
+	def rate_column(self, it, idx=slice(None)):
+		if self.reduced is not None:
+			return self.uy_modes[idx] @ self.uy_vcoeffs[it]
+		return self.vy_values[it,idx].astype(float)
+
+	# resident memory in bytes per component
+	def memory_footprint(self):
+		if self.reduced is not None:
+			footprint = {name: sum(getattr(self, name + part).nbytes for part in ['_modes', '_coeffs'] + 
+								   (['_dcoeffs'] if self.cubic else [])) for name in ['ux', 'uy']}
+		elif self.compact:
+			footprint = {'ux': self.ux_values.nbytes, 'uy': self.uy_values.nbytes}
+		else:
+			footprint = {'ux': int(self.ux_data.memory_usage(index=True, deep=True).sum()), 
+						 'uy': int(self.uy_data.memory_usage(index=True, deep=True).sum()),
+						 'tSeries': int(self.tSeries.memory_usage(index=True, deep=True).sum())}
+		if self.cubic and self.reduced is None:
+			footprint['slopes'] = self.ux_slopes.nbytes + self.uy_slopes.nbytes
+		if self.rates:
+			footprint['vy'] = self.uy_vcoeffs.nbytes if self.reduced is not None else self.vy_values.nbytes
+		footprint['coords'] = self.xvalues.nbytes + self.yvalues.nbytes
+		footprint['tvalues'] = self.tvalues.nbytes
+		footprint['total'] = sum(footprint.values())
+		return footprint
 	
 	# plot data along a vertical line for a defined time period
 	def xlineplot_evolution_uxuy(self, x, tRange):
+		import matplotlib.pyplot as plt
 		idxLst = index_list_Xfixed(x,self.xvalues)
 		xi = x
 		yi = self.yvalues[idxLst]
 		ax = setup_lineplot_uxuy('x', xi)
 		for t in tRange:
-		    ux_t = self.ux_data[str(t)]
-		    uy_t = self.uy_data[str(t)]
-		    ux_tyi = ux_t[idxLst]
-		    uy_tyi = uy_t[idxLst]
+		    ux_tyi, uy_tyi = self.displacement_column(closest(self.tvalues, t)[1], idxLst)
 		    ax[0].plot(ux_tyi, yi, linewidth=2, label=t)
 		    ax[1].plot(uy_tyi, yi, linewidth=2, label=t)
 		for i in [0,1]:
@@ -114,15 +527,13 @@ class crust():
 	
 	# plot data along a horizontal line for a defined time period
 	def ylineplot_evolution_uxuy(self, i, tRange):
+		import matplotlib.pyplot as plt
 		iR = index_range_yfixed(i,self.Nx)
 		xi = self.xvalues[iR[0]:iR[1]+1]
 		yi = self.yvalues[iR[0]]
 		ax = setup_lineplot_uxuy('y', yi)
 		for t in tRange:
-		    ux_t = self.ux_data[str(t)]
-		    uy_t = self.uy_data[str(t)]
-		    ux_tyi = ux_t[iR[0]:iR[1]+1]
-		    uy_tyi = uy_t[iR[0]:iR[1]+1]
+		    ux_tyi, uy_tyi = self.displacement_column(closest(self.tvalues, t)[1], slice(iR[0],iR[1]+1))
 		    ax[0].plot(xi, ux_tyi, linewidth=2, label=t)
 		    ax[1].plot(xi, uy_tyi, linewidth=2, label=t)
 		for i in [0,1]:
@@ -130,106 +541,91 @@ class crust():
 		    ax[i].legend()
 		plt.show()
 	
+	# register a boundary line (point selection idx) for the per-timestep profiles,
+	# coords holds the coordinate along the line
+	def register_boundary(self, name, idx, coords):
+		idx = np.arange(len(coords))[idx]
+		order = np.argsort(coords[idx], kind='stable')
+		self.boundaries[name] = (idx[order], coords[idx][order])
+		self.profiles.pop(name, None)
+
+	# piecewise linear (or monotone cubic) interpolation in time of the selected points idx
+	# (held constant outside the time range of the data)
+	def time_interpolation(self, t, idx=slice(None)):
+		it = int(np.clip(np.searchsorted(self.tvalues, t) - 1, 0, len(self.tvalues)-2))
+		t1 = self.tvalues[it]
+		t2 = self.tvalues[it+1]
+		w = min(max((t-t1)/(t2-t1), 0.0), 1.0)
+		# terms (weight, time index, slope?)
+		if (w < eps):
+			terms = [(1.0, it, False)]
+		elif not self.cubic:
+			terms = [(1-w, it, False), (w, it+1, False)]
+		else: # cubic Hermite basis
+			h = t2 - t1
+			terms = [((1 + 2*w) * (1-w)**2, it, False), (h * w * (1-w)**2, it, True), 
+					 (w**2 * (3 - 2*w), it+1, False), (h * w**2 * (w-1), it+1, True)]
+		if self.reduced is not None:
+			# blend the few time coefficients, then a single product with the modes
+			cx = sum(a * (self.ux_dcoeffs if slope else self.ux_coeffs)[i] for a, i, slope in terms)
+			cy = sum(a * (self.uy_dcoeffs if slope else self.uy_coeffs)[i] for a, i, slope in terms)
+			return self.ux_modes[idx] @ cx, self.uy_modes[idx] @ cy
+		ux_tt = 0.0
+		uy_tt = 0.0
+		for a, i, slope in terms:
+			ux_ti, uy_ti = self.slope_column(i, idx) if slope else self.displacement_column(i, idx)
+			ux_tt = ux_tt + a*ux_ti
+			uy_tt = uy_tt + a*uy_ti
+		return ux_tt, uy_tt
+
+	# first stage: time interpolated profile along a registered boundary,
+	# computed once per new t
+	def boundary_profile(self, name, t):
+		profile = self.profiles.get(name)
+		if profile is None or profile[0] != t:
+			idx, coords = self.boundaries[name]
+			ux_tt, uy_tt = self.time_interpolation(t, idx)
+			profile = (t, coords, ux_tt, uy_tt)
+			self.profiles[name] = profile
+		return profile
+
+	# second stage: interpolation along the line into the cached profile
+	def interpolate_boundary(self, name, s, t):
+		t, coords, ux_tt, uy_tt = self.boundary_profile(name, t)
+		return np.interp(s, coords, ux_tt), np.interp(s, coords, uy_tt)
+
+	# time interpolated field at all data points, computed once per new t
+	def field(self, t):
+		if self.field_cache is None or self.field_cache[0] != t:
+			self.field_cache = (t,) + self.time_interpolation(t)
+		return self.field_cache[1:]
+
+	# bilinear interpolation at arbitrary points (scalars or arrays)
+	def interpolate_uxuy(self, x, y, t):
+		ux_tt, uy_tt = self.field(t)
+		return self.grid.interpolate(ux_tt, x, y), self.grid.interpolate(uy_tt, x, y)
+
+	# deflection rate field at all data points (linear in time), computed once per new t
+	def rate_field(self, t):
+		if self.rate_cache is None or self.rate_cache[0] != t:
+			it = int(np.clip(np.searchsorted(self.tvalues, t) - 1, 0, len(self.tvalues)-2))
+			w = min(max((t-self.tvalues[it])/(self.tvalues[it+1]-self.tvalues[it]), 0.0), 1.0)
+			vy_t1 = self.rate_column(it)
+			vy_t2 = self.rate_column(it+1)
+			self.rate_cache = (t, vy_t1 + w*(vy_t2-vy_t1))
+		return self.rate_cache[1]
+
+	# deflection rate duy/dt in m/ka at arbitrary points (scalars or arrays)
+	def interpolate_vy(self, x, y, t):
+		return self.grid.interpolate(self.rate_field(t), x, y)
+
 	# Interpolation for a constant y value (along fixed horizontal line)
-	# TODO rewrite using u vector
-	@functools.lru_cache
 	def interpolateX_data_uxuy(self,x,y,t):
-		#i  = 3 # index for y=-7500m
-		#iR = index_range_yfixed(i, self.Nx)
-		iR = self.idRng_horizont
-		xi = self.xvalues[iR[0]:iR[1]+1]
-		yi = self.yvalues[iR[0]]
-		
-		# first interpolation between two time points closest to t
-		t1 = closest(self.tvalues, t)[0]
-		t2 = t1 + np.sign(t-t1) * self.dt
-
-		ux_t1 = self.ux_data[str(t1)].to_numpy(dtype=float)
-		uy_t1 = self.uy_data[str(t1)].to_numpy(dtype=float)
-		ux_t1yi = ux_t1[iR[0]:iR[1]+1]
-		uy_t1yi = uy_t1[iR[0]:iR[1]+1]
-		
-		ux_ttyi = ux_t1yi.copy()
-		uy_ttyi = uy_t1yi.copy()
-		# secant correction if necessary
-		if (np.abs(t1-t2) > eps):
-			ux_t2 = self.ux_data[str(t2)].to_numpy(dtype=float)
-			uy_t2 = self.uy_data[str(t2)].to_numpy(dtype=float)
-			ux_t2yi = ux_t2[iR[0]:iR[1]+1]
-			uy_t2yi = uy_t2[iR[0]:iR[1]+1]
-			ux_ttyi += (ux_t2yi - ux_t1yi) * (t1-t)/(t1-t2)
-			uy_ttyi += (uy_t2yi - uy_t1yi) * (t1-t)/(t1-t2)
-		
-		# second interpolation between two positions closest to x
-		tu = closest(xi, x)
-		x1 = tu[0]
-		x2 = x1 + np.sign(x-x1) * self.dx
-		id1 = tu[1]
-		id2 = int(id1 + np.sign(x-x1))  # + because x>0!
-		
-		ux_ttyix1 = ux_ttyi[id1]
-		uy_ttyix1 = uy_ttyi[id1]
-		
-		ux_ttyixx = ux_ttyix1.copy()
-		uy_ttyixx = uy_ttyix1.copy()
-		# secant correction if necessary
-		if (np.abs(x1-x2) > eps):
-			ux_ttyix2 = ux_ttyi[id2]
-			uy_ttyix2 = uy_ttyi[id2]
-			ux_ttyixx += (ux_ttyix2 - ux_ttyix1) * (x1-x)/(x1-x2)
-			uy_ttyixx += (uy_ttyix2 - uy_ttyix1) * (x1-x)/(x1-x2)
-		
-		return ux_ttyixx, uy_ttyixx
+		return self.interpolate_boundary('bottom', x, t)
 	
 	# Interpolation for a constant x value (along fixed vertical line)
-	# TODO rewrite using u vector
-	@functools.lru_cache
 	def interpolateY_data_uxuy(self,x,y,t):
-		# index list for x=1150000
-		idxLst = self.idLst_vertical
-		xi = x
-		yi = self.yvalues[idxLst]
-
-		# first interpolation between two time points closest to t
-		t1 = closest(self.tvalues, t)[0]
-		t2 = t1 + np.sign(t-t1) * self.dt
-
-		ux_t1 = self.ux_data[str(t1)].to_numpy(dtype=float)
-		uy_t1 = self.uy_data[str(t1)].to_numpy(dtype=float)
-		ux_t1xi = ux_t1[idxLst]
-		uy_t1xi = uy_t1[idxLst]
-		
-		ux_ttxi = ux_t1xi.copy()
-		uy_ttxi = uy_t1xi.copy()
-		# secant correction if necessary
-		if (np.abs(t1-t2) > eps):
-			ux_t2 = self.ux_data[str(t2)].to_numpy(dtype=float)
-			uy_t2 = self.uy_data[str(t2)].to_numpy(dtype=float)
-			ux_t2xi = ux_t2[idxLst]
-			uy_t2xi = uy_t2[idxLst]
-			ux_ttxi += (ux_t2xi - ux_t1xi) * (t1-t)/(t1-t2)
-			uy_ttxi += (uy_t2xi - uy_t1xi) * (t1-t)/(t1-t2)
-
-		# second interpolation between two positions closest to y
-		tu = closest(yi, y)
-		y1 = tu[0]
-		y2 = y1 + np.sign(y-y1) * self.dy(y)
-		id1 = tu[1]
-		id2 = int(id1 - np.sign(y-y1)) # - because y<0!
-		
-		ux_tty1xi = ux_ttxi[id1]
-		uy_tty1xi = uy_ttxi[id1]
-		
-		ux_ttyyxi = ux_tty1xi.copy()
-		uy_ttyyxi = uy_tty1xi.copy()
-		# secant correction if necessary
-		if (np.abs(y1-y2) > eps):
-			ux_tty2xi = ux_ttxi[id2]
-			uy_tty2xi = uy_ttxi[id2]
-			ux_ttyyxi += (ux_tty2xi - ux_tty1xi) * (y1-y)/(y1-y2)
-			uy_ttyyxi += (uy_tty2xi - uy_tty1xi) * (y1-y)/(y1-y2)
-		
-		return ux_ttyyxi, uy_ttyyxi
+		return self.interpolate_boundary('lateral', y, t)
 
 	# check interpolation algorithms
 	def check_interpolationX_uxuy(self, t, y = -7500):
@@ -258,3 +654,92 @@ class crust():
 		    
 		self.xlineplot_evolution_uxuy(x,[t])
 
+
+
+
+# Hierarchy of nested GIA data sets, e.g. a coarse continental grid with finer grids
+# around the site: each point is evaluated on the finest grid covering it
+class nested_crust():
+	
+	def __init__(self, datapaths, compact=False, shared=False, cubic=False, reduced=None, rates=False, 
+				 x_lateral=1150000, y_bottom=-7500):
+		levels = [crust(datapath, compact, shared, cubic, reduced, rates) for datapath in datapaths]
+		# finest grid first
+		self.levels = sorted(levels, key=lambda level: level.grid.cellsize)
+		# spatial index of the grid extents: (xmin, xmax, ymin, ymax) per level
+		self.extents = np.array([level.grid.extent for level in self.levels])
+		self.x_lateral = x_lateral
+		self.y_bottom = y_bottom
+		self.bottom  = displacement_pair(self.interpolateX_data_uxuy)
+		self.lateral = displacement_pair(self.interpolateY_data_uxuy)
+
+	# index of the finest level covering each point (coarsest level if none does)
+	def level_index(self, x, y):
+		x = np.atleast_1d(np.asarray(x, dtype=float))
+		y = np.atleast_1d(np.asarray(y, dtype=float))
+		inside = (self.extents[:,0,None] <= x) & (x <= self.extents[:,1,None]) & \
+				 (self.extents[:,2,None] <= y) & (y <= self.extents[:,3,None])
+		return np.where(inside.any(axis=0), inside.argmax(axis=0), len(self.levels)-1)
+
+	# vectorized per level
+	def interpolate_uxuy(self, x, y, t):
+		xa, ya = np.broadcast_arrays(np.atleast_1d(np.asarray(x, dtype=float)), 
+									 np.atleast_1d(np.asarray(y, dtype=float)))
+		lvl = self.level_index(xa, ya)
+		ux = np.empty(xa.shape)
+		uy = np.empty(xa.shape)
+		for k in np.unique(lvl):
+			sel = (lvl == k)
+			ux[sel], uy[sel] = self.levels[k].interpolate_uxuy(xa[sel], ya[sel], t)
+		if np.ndim(x) or np.ndim(y):
+			return ux, uy
+		return ux[0], uy[0]
+
+	def interpolate_vy(self, x, y, t):
+		xa, ya = np.broadcast_arrays(np.atleast_1d(np.asarray(x, dtype=float)), 
+									 np.atleast_1d(np.asarray(y, dtype=float)))
+		lvl = self.level_index(xa, ya)
+		vy = np.empty(xa.shape)
+		for k in np.unique(lvl):
+			sel = (lvl == k)
+			vy[sel] = self.levels[k].interpolate_vy(xa[sel], ya[sel], t)
+		if np.ndim(x) or np.ndim(y):
+			return vy
+		return vy[0]
+
+	def interpolateX_data_uxuy(self,x,y,t):
+		return self.interpolate_uxuy(x, self.y_bottom, t)
+
+	def interpolateY_data_uxuy(self,x,y,t):
+		return self.interpolate_uxuy(self.x_lateral, y, t)
+
+	def memory_footprint(self):
+		return {level.datapath: level.memory_footprint() for level in self.levels}
+
+	# plot helpers: line plots of the data from the coarsest level (covers the domain),
+	# the checks run the nested interpolation over its extent
+	@property
+	def coarsest(self):
+		return self.levels[-1]
+
+	def xlineplot_evolution_uxuy(self, x, tRange):
+		self.coarsest.xlineplot_evolution_uxuy(x, tRange)
+
+	def ylineplot_evolution_uxuy(self, i, tRange):
+		self.coarsest.ylineplot_evolution_uxuy(i, tRange)
+
+	xmin = property(lambda self: self.coarsest.xmin)
+	xmax = property(lambda self: self.coarsest.xmax)
+	ymin = property(lambda self: self.coarsest.ymin)
+	ymax = property(lambda self: self.coarsest.ymax)
+	check_interpolationX_uxuy = crust.check_interpolationX_uxuy
+	check_interpolationY_uxuy = crust.check_interpolationY_uxuy
+
+
+# one crust per data set, shared by all BCs reading it
+# (a tuple of data paths gives nested grids)
+@functools.lru_cache(maxsize=None)
+def shared_crust(datapath='data/', compact=False, shared=False, cubic=False, reduced=None, rates=False):
+	if isinstance(datapath, tuple):
+		return nested_crust(datapath, compact, shared, cubic, reduced, rates)
+	return crust(datapath, compact, shared, cubic, reduced, rates)
@@ -1,25 +1,56 @@
 # Data model of the evolving crust (thermal and mechanical farfield)
 # Physical units: kg, m, s, K
 
+import os
 import numpy as np
+import crustclass as gia	# gridded GIA data and interpolation
+
+from constants_AREHS import s_a
+
+# gridded map of the geothermal heat flux over the horizontal coordinates
+# file with header line and columns: x z q_geo (a single z for 2D models)
+class heatflux_map():
+
+	def __init__(self, filename):
+		table = np.loadtxt(os.path.expanduser(filename), dtype=float, skiprows=1, ndmin=2)
+		self.grid = gia.grid2D(table[:,0], table[:,1])
+		self.q_values = table[:,2]
+
+	def heatflux(self, x, z):
+		return self.grid.interpolate(self.q_values, x, z)
 
-#from constants_AREHS import *
 
 class crust():
 	# class variables:
 		
 	# constructor
-	def __init__(self, q_geo):
+	# optional datapath with gridded input fields (model coordinates):
+	#  ux.dat, uy.dat - displacement time series (GIA format, times in ka)
+	#  qgeo.dat       - spatial map of the geothermal heat flux
+	def __init__(self, q_geo, datapath=None):
 		# instance variables: owned by instances of the class, can be different for each instance
 		self.q_geo = q_geo
+		self.gia = None
+		self.qmap = None
+		if datapath is not None:
+			if os.path.exists(os.path.expanduser(datapath + 'ux.dat')):
+				self.gia = gia.shared_crust(datapath, compact=True)
+			if os.path.exists(os.path.expanduser(datapath + 'qgeo.dat')):
+				self.qmap = heatflux_map(datapath + 'qgeo.dat')
+	
+	def geothermal_heatflux(self, x=0.0, z=0.0):
+		if self.qmap is None:
+			return [0.0, self.q_geo, 0.0]
+		return [0.0, self.qmap.heatflux(x, z), 0.0]
 	
-	def geothermal_heatflux(self):
-		return [0.0, self.q_geo, 0.0]
+	def displacement(self,x,y,z,t):
+		if self.gia is None:
+			return [0.0, 0.0, 0.0]
+		ux, uy = self.gia.interpolate_uxuy(x, y, t/s_a/1000)
+		return [ux, uy, 0.0]
 		
 	def displacement_below(self,x,y,z,t):
-		#TODO
-		return [0.0, 0.0, 0.0]
+		return self.displacement(x,y,z,t)
 		
 	def displacement_aside(self,x,y,z,t):
-		#TODO
-		return [0.0, 0.0, 0.0]
+		return self.displacement(x,y,z,t)
@@ -0,0 +1,59 @@
+# Diagnostics of the BC collections via logging, kept off the hot path:
+# records are queued and written by a background thread
+# level from the environment: GLACIATIONBCS_LOGLEVEL = DEBUG | INFO (default) | WARNING | ...
+
+import os
+import sys
+import atexit
+import queue
+import logging
+import logging.handlers
+
+logger = logging.getLogger('glaciationBCs')
+
+def setup(level=None, stream=None):
+	if getattr(logger, 'listener', None) is not None:
+		return logger
+	level = level or (os.environ.get('GLACIATIONBCS_LOGLEVEL') or 'INFO').upper()
+	try:
+		logger.setLevel(level)
+		unknown = None
+	except (ValueError, TypeError):
+		# a typo in the environment must not stop the simulation
+		logger.setLevel(logging.INFO)
+		unknown = level
+	logger.propagate = False
+	records = queue.SimpleQueue()
+	handler = logging.StreamHandler(stream or sys.stdout)
+	handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+	logger.addHandler(logging.handlers.QueueHandler(records))
+	logger.listener = logging.handlers.QueueListener(records, handler)
+	logger.listener.start()
+	atexit.register(logger.listener.stop)
+	if unknown is not None:
+		logger.warning("unknown log level %r, using INFO", unknown)
+	return logger
+
+setup()
+
+
+class stage_monitor():
+	# structured stage-transition events of one model: the stage is checked once per
+	# change of t and reported only when it changes (every t on DEBUG level)
+
+	def __init__(self, model, stage):
+		self.model = model
+		self.stage = stage	# function t -> stage name
+		self.t = None
+		self.current = None
+
+	def __call__(self, t):
+		if t == self.t:
+			return
+		self.t = t
+		stage = self.stage(t)
+		if stage != self.current:
+			logger.info("stage transition model=%s t=%r from=%r to=%r", self.model, t, self.current, stage)
+			self.current = stage
+		elif logger.isEnabledFor(logging.DEBUG):
+			logger.debug("time step model=%s t=%r stage=%r", self.model, t, stage)
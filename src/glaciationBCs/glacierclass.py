@@ -2,9 +2,8 @@
 # parameterized analytical function for glacier geometry
 # Physical units: kg, m, s, K
 
+import functools
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
 
 from math import pi, sin, cos, sinh, cosh, sqrt, exp
 
@@ -33,6 +32,16 @@ deflection_modes = {
     }
 deflection_mode = 0
 
+# local functions take scalars or arrays of x: arrays in, arrays out; scalars in, floats out
+def as_result(x, value):
+	return value if isinstance(x, np.ndarray) else float(value)
+
+
+# one glacier per parameter set, shared by all BCs using it
+@functools.lru_cache(maxsize=None)
+def shared_glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2=0, t_3=0, t_4=0):
+	return glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+
 
 class glacier():
 	# class variables: owned by the class itself, static, shared by all class instances
@@ -54,7 +63,6 @@ class glacier():
 		self.t_4 = t_4; #print("t4 = ", t_4)
 
 	def stagecontrol(self, t):
-		print("t = ", t)
 		if (     0.0 < t <= self.t_0):
 			return stages[0]
 		if (self.t_0 < t <= self.t_1):
@@ -87,31 +95,24 @@ class glacier():
 	def local_height(self,x,t):
 		l = self.length(t)
 		if l==0:
-			return 0
-		else:
-			xi = (x-self.x_0) / l
-			if xi<=1: 
-				return self.height(t) * ((1 - (xi**2.5)**1.5))
-			else: 
-				#print("Warning: local coordinate must not be greater 1, but is ", xi)
-				return 0
+			return as_result(x, np.zeros(np.shape(x)))
+		# local coordinate, no glacier for xi > 1
+		xi = np.maximum((np.asarray(x, dtype=float)-self.x_0) / l, 0.0)
+		h = np.where(xi<=1, self.height(t) * ((1 - (np.minimum(xi,1)**2.5)**1.5)), 0.0)
+		return as_result(x, h)
 	
 	def local_height_rate(self,x,t):
 		h = self.height(t)
 		l = self.length(t)
 		if l==0:
-			return 0
-		else:
-			xi = (x-self.x_0) / l
-			if xi<=1:
-				doth = self.height_rate(t)
-				dotl = self.length_rate(t)
-				part1 = doth / h * ((1 - (xi**2.5)**1.5))
-				part2 = dotl / l * 15/4.0 * ((1 - (xi**2.5)**0.5)) * (xi**2.5)
-				return h * (part1 + part2)
-			else:
-				#print("Warning: local coordinate must not be greater 1, but is ", xi)
-				return 0
+			return as_result(x, np.zeros(np.shape(x)))
+		xi = np.maximum((np.asarray(x, dtype=float)-self.x_0) / l, 0.0)
+		xi25 = np.minimum(xi,1)**2.5
+		doth = self.height_rate(t)
+		dotl = self.length_rate(t)
+		part1 = doth / h * ((1 - xi25**1.5))
+		part2 = dotl / l * 15/4.0 * ((1 - xi25**0.5)) * xi25
+		return as_result(x, np.where(xi<=1, h * (part1 + part2), 0.0))
 
 	# piecewise linear laws for the evolution of the glacier's dimensions
 	def height(self, t):
@@ -176,63 +177,64 @@ class glacier():
 		
 	# heuristic approximation from glacier height (Bense)
 	def local_deflection_rate_heuristic(self,x,t):
+		xa = np.asarray(x, dtype=float)
 		t_relax = (self.t_4-self.t_0) / 13 #~2500 a
-		h0 = self.local_height(x,self.t_0)
-		uy_max = -b_sub * (self.local_height(x,self.t_1) - h0)
-		uy_med = uy_max + b_reb * (self.local_height(x,self.t_2) - self.local_height(x,self.t_3))
+		h0 = self.local_height(xa,self.t_0)
+		uy_max = -b_sub * (self.local_height(xa,self.t_1) - h0)
+		uy_med = uy_max + b_reb * (self.local_height(xa,self.t_2) - self.local_height(xa,self.t_3))
 		# time point when the ice has locally completely retreated
-		t_startPG = self.t_3 - (self.t_3-self.t_2) * (x-self.x_0) / self.L_max
+		t_startPG = self.t_3 - (self.t_3-self.t_2) * (xa-self.x_0) / self.L_max
 
-		vy = 0.0
+		vy = np.zeros(xa.shape)
 		if (self.t_0 < t <= self.t_1): #immediate deflection
-			vy = -b_sub * self.local_height_rate(x,t)
+			vy = -b_sub * self.local_height_rate(xa,t)
 		if (self.t_1 < t <= self.t_2): #constant subsidence
-			vy = 0.0
+			vy = np.zeros(xa.shape)
 		if (self.t_2 < t <= self.t_3): #restrained rebound
-			vy = -b_reb * self.local_height_rate(x,t)
-		if (t > t_startPG): #postglacial rebound (retarded)
-			dt = t - t_startPG
-			# process starts immediately after local post-glaciation
-			vy = - uy_med * exp(-dt/t_relax) / t_relax
-		return vy
+			vy = -b_reb * self.local_height_rate(xa,t)
+		#postglacial rebound (retarded)
+		# process starts immediately after local post-glaciation
+		dt = np.maximum(t - t_startPG, 0.0)
+		vy = np.where(t > t_startPG, - uy_med * np.exp(-dt/t_relax) / t_relax, vy)
+		return as_result(x, vy)
 
 	def local_deflection_heuristic(self,x,t):
+		xa = np.asarray(x, dtype=float)
 		t_relax = (self.t_4-self.t_0) / 13 #~2500 a
 		#t_relax = 2500 * 31557600 #s
-		h0 = self.local_height(x,self.t_0)
-		uy_max = -b_sub * (self.local_height(x,self.t_1) - h0)
-		uy_med = uy_max + b_reb * (self.local_height(x,self.t_2) - self.local_height(x,self.t_3))
+		h0 = self.local_height(xa,self.t_0)
+		uy_max = -b_sub * (self.local_height(xa,self.t_1) - h0)
+		uy_med = uy_max + b_reb * (self.local_height(xa,self.t_2) - self.local_height(xa,self.t_3))
 		# time point when the ice has locally completely retreated
-		t_startPG = self.t_3 - (self.t_3-self.t_2) * (x-self.x_0) / self.L_max
+		t_startPG = self.t_3 - (self.t_3-self.t_2) * (xa-self.x_0) / self.L_max
 		
-		uy = 0.0
+		uy = np.zeros(xa.shape)
 		if (self.t_0 < t <= self.t_1): #immediate deflection
-			uy = -b_sub * (self.local_height(x,t) - h0)
+			uy = -b_sub * (self.local_height(xa,t) - h0)
 		if (self.t_1 < t <= self.t_2): #constant subsidence
 			uy = uy_max
 		if (self.t_2 < t <= self.t_3): #restrained rebound
-			uy = uy_max + b_reb * (self.local_height(x,self.t_2) - self.local_height(x,t))
-		if (t > t_startPG): #postglacial rebound (retarded)
-			dt = t - t_startPG
-			# process starts immediately after local post-glaciation
-			uy = uy_med * exp(-dt/t_relax)
-		return uy
+			uy = uy_max + b_reb * (self.local_height(xa,self.t_2) - self.local_height(xa,t))
+		#postglacial rebound (retarded)
+		# process starts immediately after local post-glaciation
+		dt = np.maximum(t - t_startPG, 0.0)
+		uy = np.where(t > t_startPG, uy_med * np.exp(-dt/t_relax), uy)
+		return as_result(x, uy)
 
 	def local_displacement_heuristic(self,x,y,t):
+		xa = np.asarray(x, dtype=float)
 		# TODO: move constants on top
 		eps_yy = -0.0005
 		H_dom = 150000 #TODO scaling with 20?
-		uy_compaction = (H_dom-(-y)) * eps_yy
-		uy_deflection = self.local_deflection_heuristic(x,t)
+		uy_compaction = (H_dom-(-np.asarray(y, dtype=float))) * eps_yy
+		uy_deflection = self.local_deflection_heuristic(xa,t)
 		
-		h0 = self.local_height(x,self.t_0)
-		uy_max = -b_sub * (self.local_height(x,self.t_1) - h0)
+		h0 = self.local_height(xa,self.t_0)
+		uy_max = -b_sub * (self.local_height(xa,self.t_1) - h0)
 		
-		if (abs(uy_max)>0.0):
-			uy = (1 + uy_compaction/uy_max) * uy_deflection
-		else:
-			uy = uy_deflection
-		return uy
+		loaded = (abs(uy_max)>0.0)
+		uy = np.where(loaded, (1 + uy_compaction/np.where(loaded, uy_max, 1.0)) * uy_deflection, uy_deflection)
+		return as_result(x, uy)
 
 	# analytical function for the lithosphere deflection due to glacier load
 	def local_deflection_elastic(self,x,t):
@@ -243,19 +245,18 @@ class glacier():
 		L  = self.L_dom
 		qG = self.height(t) * self.rho_ice * gravity
 		qM = 0.9*qG * xG/L
-		uy = 0.0
-		if (x-self.x_0 < xG):
-			x1 = x - self.x_0
-			part1 = qM * ( (L-xG)**3 * (x1/6-L/8-xG/24) )
-			part2 = (qG-qM)/2 * (x1**4/12 - (L-xG)*L*xG*x1 - xG**3*x1/3 + 2/3*L**3*xG - 1/2*L**2*xG**2 + xG**4/12)
-			uy = -(part1 + part2) / EI
-		else:
-			x2 = x - self.x_0 - xG
-			part1 = qM * ( (L-xG)**3 * (x2/6-(L-xG)/8) - x2**4/24 )
-			part2 = (qG-qM)*xG/2 * ( x2**2*(xG/2+x2/3) + (L-xG)*( (L-xG)*(2/3*L - xG/6) - L*x2) )
-			uy = -(part1 + part2) / EI
+		# below the glacier
+		x1 = np.asarray(x, dtype=float) - self.x_0
+		part1 = qM * ( (L-xG)**3 * (x1/6-L/8-xG/24) )
+		part2 = (qG-qM)/2 * (x1**4/12 - (L-xG)*L*xG*x1 - xG**3*x1/3 + 2/3*L**3*xG - 1/2*L**2*xG**2 + xG**4/12)
+		uy_below = -(part1 + part2) / EI
+		# in front of the glacier
+		x2 = x1 - xG
+		part1 = qM * ( (L-xG)**3 * (x2/6-(L-xG)/8) - x2**4/24 )
+		part2 = (qG-qM)*xG/2 * ( x2**2*(xG/2+x2/3) + (L-xG)*( (L-xG)*(2/3*L - xG/6) - L*x2) )
+		uy_front = -(part1 + part2) / EI
 		
-		return uy
+		return as_result(x, np.where(x1 < xG, uy_below, uy_front))
 
 	# analytical function for the glacier meltwater production
 	def local_meltwater(self,x,t):
@@ -272,6 +273,7 @@ class glacier():
 		print(self.normalstress(0,self.t_1)/1e6, "MPa")
 		
 	def plot_evolution(self):
+		import matplotlib.pyplot as plt
 		tRange = np.linspace(self.t_1,self.t_0,11)
 		fig,ax = plt.subplots()
 		ax.set_title('Glacier evolution') #'Gletschervorstoß'
@@ -298,6 +300,7 @@ class glacier():
 		print('uy(xG+1)= ',self.local_deflection(xG+1,self.t_1), "m")
 		
 	def plot_deflection(self):
+		import matplotlib.pyplot as plt
 		tRange = np.linspace(self.t_4,10*self.t_4,11)
 		fig,ax = plt.subplots()
 		ax.set_title('Crustal deflection')
@@ -318,6 +321,7 @@ class glacier():
 		plt.show()
 	
 	def plot_deflection_rate(self):
+		import matplotlib.pyplot as plt
 		tRange = np.linspace(self.t_3,self.t_4,11)
 		fig,ax = plt.subplots()
 		ax.set_title('Crustal deflection rate')
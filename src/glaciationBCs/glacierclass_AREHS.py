@@ -3,12 +3,15 @@
 # Physical units: kg, m, s, K
 
 import numpy as np
-import matplotlib.pyplot as plt
 import time_control_AREHS as tcr
 
 from constants_AREHS import s_a
 from constants_AREHS import gravity
 
+# float for scalar x, array for array x
+def as_result(x, value):
+	return value if isinstance(x, np.ndarray) else float(value)
+
 class glacier():
 	# class variables: owned by the class itself, static, shared by all class instances
 	rho_ice = 900 #kg/m³
@@ -18,7 +21,8 @@ class glacier():
 	qf_melt = 6e-3 * 1 / s_a # = 6mm/a
 	
 	# constructor
-	def __init__(self, L_dom, L_max, H_max, x_0, t_):
+	# optional harmonics of a climate forcing: relative modulation of the ice volume (height)
+	def __init__(self, L_dom, L_max, H_max, x_0, t_, harmonics=None):
 		# instance variables
 		self.L_dom = L_dom
 		self.L_max = L_max
@@ -28,7 +32,7 @@ class glacier():
 		
 		H_ = [0.0, 0.0, 0.0, 0.0, H_max, H_max, 0.0]
 		L_ = [0.0, 0.0, 0.0, 0.0, L_max, L_max, 0.0]
-		self.tcr_h = tcr.time_control(t_, H_)
+		self.tcr_h = tcr.time_control(t_, H_, harmonics)
 		self.tcr_l = tcr.time_control(t_, L_)
 		
 	def normalstress(self, x, t):
@@ -43,24 +47,21 @@ class glacier():
 	def temperature(self, x, t):
 		return self.T_under
     
-	# analytical function for the glacier's shape
+	# analytical function for the glacier's shape (x scalar or array)
 	def local_height(self,x,t):
 		# TODO coords = swap(coords) # y->x, z->y
 	
 		l = self.length(t)
 		if l==0:
-			return 0
-		else:
-			xi = (x-self.x_0) / l
-			if xi<=1: 
-				return self.height(t) * ((1 - (xi**2.5)**1.5))
-			else: 
-				#print("Warning: local coordinate must not be greater 1, but is ", xi)
-				return 0
+			return as_result(x, np.zeros(np.shape(x)))
+		# local coordinate, no glacier for xi > 1
+		xi = np.maximum((np.asarray(x, dtype=float)-self.x_0) / l, 0.0)
+		h = np.where(xi<=1, self.height(t) * ((1 - (np.minimum(xi,1)**2.5)**1.5)), 0.0)
+		return as_result(x, h)
 
 	# piecewise linear laws for the evolution of the glacier's dimensions
 	def height(self, t):
-		return self.tcr_h.function_value(t)
+		return max(self.tcr_h.function_value(t) * (1 + self.tcr_h.time_modulation(t)), 0.0)
 
 	def length(self, t):
 		return self.tcr_l.function_value(t)
@@ -68,7 +69,7 @@ class glacier():
 	# analytical function for the glacier meltwater production
 	def local_meltwater(self,x,t):
 		# constant flux at a temperate glacier base
-		q = qf_melt
+		q = self.qf_melt
 		# constant flux at a frozen glacier base
 		q = 0.0
 		
@@ -80,6 +81,7 @@ class glacier():
 		print(self.normalstress(self.x_0,self.t_[5])/1e6, "MPa")
 		
 	def plot_evolving_shape(self):
+		import matplotlib.pyplot as plt
 		tRange = np.linspace(self.t_[6],self.t_[0],11)
 		fig,ax = plt.subplots()
 		ax.set_title('Glacier evolution') #'Gletschervorschub'
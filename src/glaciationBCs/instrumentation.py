@@ -0,0 +1,132 @@
+# Opt-in profiling of the BC objects for OpenGeoSys
+# enable with GLACIATIONBCS_PROFILE=<file prefix> (or =1 for glaciationBCs_profile):
+# per BC name call counts per time step, time per call (total, percentiles) and time
+# spent in the glacier/air/crust/repo submodels, written to <prefix>.json and .csv at exit
+# when disabled nothing is wrapped, the hot path is untouched
+
+import os
+import csv
+import json
+import time
+import types
+import random
+import atexit
+import functools
+
+import numpy as np
+
+output = os.environ.get('GLACIATIONBCS_PROFILE', '')
+enabled = output not in ('', '0')
+if output.lower() in ('1', 'true', 'yes'):
+	output = 'glaciationBCs_profile'
+# one summary per MPI rank
+rank = os.environ.get('OMPI_COMM_WORLD_RANK') or os.environ.get('PMI_RANK')
+if rank is not None:
+	output += '_rank' + rank
+
+stats = {}			# BC name -> bc_stats
+current = [None]	# bc_stats of the BC callback running
+depth = [0]			# nesting of submodel calls (only the outermost is timed)
+
+
+class bc_stats():
+	# call statistics of one BC object, durations kept as reservoir sample for percentiles
+	samples = 100000
+
+	def __init__(self, name):
+		self.name = name
+		self.calls = 0
+		self.total = 0.0
+		self.step_calls = {}	# t -> calls
+		self.durations = []
+		self.submodels = {}		# model kind -> time
+
+	def record(self, t, dt):
+		self.calls += 1
+		self.total += dt
+		self.step_calls[t] = self.step_calls.get(t, 0) + 1
+		if len(self.durations) < self.samples:
+			self.durations.append(dt)
+		else:
+			j = random.randrange(self.calls)
+			if j < self.samples:
+				self.durations[j] = dt
+
+	def summary(self):
+		steps = np.array(list(self.step_calls.values()))
+		p50, p90, p99 = np.percentile(self.durations, [50, 90, 99]) * 1e6 if self.durations else (0.0, 0.0, 0.0)
+		return {'bc': self.name, 'calls': self.calls, 'steps': len(steps),
+				'calls_per_step_mean': float(steps.mean()) if len(steps) else 0.0,
+				'calls_per_step_max': int(steps.max()) if len(steps) else 0,
+				'total_s': self.total, 'mean_us': self.total/self.calls*1e6 if self.calls else 0.0,
+				'p50_us': float(p50), 'p90_us': float(p90), 'p99_us': float(p99),
+				'submodels_s': dict(self.submodels)}
+
+
+def timed_callback(callback, s):
+	@functools.wraps(callback)
+	def timed(t, *args):
+		previous = current[0]
+		current[0] = s
+		t0 = time.perf_counter()
+		try:
+			return callback(t, *args)
+		finally:
+			s.record(t, time.perf_counter() - t0)
+			current[0] = previous
+	return timed
+
+# wrap the OGS callbacks of a BC object (instance attributes, the class stays untouched)
+def instrument_bc(name, bc):
+	if not enabled:
+		return bc
+	s = stats.setdefault(name, bc_stats(name))
+	for method in ('getDirichletBCValue', 'getFlux'):
+		# only callbacks implemented in python
+		if isinstance(getattr(type(bc), method, None), types.FunctionType):
+			setattr(bc, method, timed_callback(getattr(bc, method), s))
+	return bc
+
+
+def timed_model(f, kind):
+	@functools.wraps(f)
+	def timed(*args, **kwargs):
+		s = current[0]
+		if s is None or depth[0]:
+			return f(*args, **kwargs)
+		depth[0] += 1
+		t0 = time.perf_counter()
+		try:
+			return f(*args, **kwargs)
+		finally:
+			depth[0] -= 1
+			s.submodels[kind] = s.submodels.get(kind, 0.0) + time.perf_counter() - t0
+	timed.instrumented = True
+	return timed
+
+# wrap the public methods of the model classes: {kind: [classes]}
+def instrument_models(models):
+	if not enabled:
+		return
+	for kind, classes in models.items():
+		for cls in classes:
+			for name, f in list(vars(cls).items()):
+				if isinstance(f, types.FunctionType) and not getattr(f, 'instrumented', False) and \
+				   not name.startswith(('_', 'plot', 'print', 'check')):
+					setattr(cls, name, timed_model(f, kind))
+
+
+def write_summary():
+	rows = [stats[name].summary() for name in sorted(stats) if stats[name].calls]
+	with open(output + '.json', 'w') as f:
+		json.dump(rows, f, indent=1)
+	kinds = sorted({kind for row in rows for kind in row['submodels_s']})
+	fields = [key for key in rows[0] if key != 'submodels_s'] if rows else ['bc']
+	with open(output + '.csv', 'w', newline='') as f:
+		writer = csv.writer(f)
+		writer.writerow(fields + [kind + '_s' for kind in kinds])
+		for row in rows:
+			writer.writerow([row[key] for key in fields] + [row['submodels_s'].get(kind, 0.0) for kind in kinds])
+
+if enabled:
+	atexit.register(write_summary)
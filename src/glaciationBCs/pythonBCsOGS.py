@@ -7,7 +7,12 @@ import glaciationBCs
 from glaciationBCs import glacierclass as glc	#glacial objects
 from glaciationBCs import crustclass as crc 	#crustal objects
 from glaciationBCs import airclass as air		# aerial objects
+from glaciationBCs import bcbaseclass as bcb	# batch evaluation
+from glaciationBCs import diagnostics as diag	# logging
+from glaciationBCs import instrumentation as instr	# optional profiling
+from glaciationBCs import bctable as bct		# offline tables
 
+import functools
 import numpy as np
 
 s_a = 365.25*24*3600 #=31557600 seconds per year
@@ -67,7 +72,52 @@ y_sfactor = 20 #TODO!
 
 # Optional: Choose path to external data
 path2data = '~/Forschung/Simulations/OpenGeoSys/SedimentaryBasinBense/HM/dataGIA/'
+# or nested GIA grids as tuple of paths, e.g. (path2coarse, path2fine)
+# share the GIA arrays between all processes (MPI ranks) of a host
+shareGIA = False
+# monotone cubic time interpolation of the GIA data (allows coarser time sampling)
+cubicGIA = False
+# reduced-order GIA data (truncated SVD) with relative energy tolerance, None for full data
+reducedGIA = None
+# hydraulic source term from GIA deflection rates instead of the glacier heuristic
+deflectionGIA = False
 plotinput = False
+# Optional: serve BCs from offline tables exported by tools/export_bc_table.py
+# {bc name: table prefix}, e.g. {'bc_M_crustal_below_Dirichlet_y': 'tables/below_y'}
+replay_tables = {}
+
+@functools.lru_cache(maxsize=None)
+def glacier_stage_monitor(glacier):
+	return diag.stage_monitor('glacier', glacier.stagecontrol)
+
+# GIA data model shared by all crustal BCs reading the same data (default: path2data)
+def gia_crust(datapath=None):
+	if datapath is None:
+		datapath = path2data
+	return crc.shared_crust(datapath, shared=shareGIA, cubic=cubicGIA, reduced=reducedGIA, rates=deflectionGIA)
+
+class geosphere():
+	# models of the external geosphere, shared per parameter set and built on first use
+	# (BCs store their parameters only, so unused BCs cost nothing)
+	path2data = None	# GIA data of the BC, None for the module setting path2data
+
+	@functools.cached_property
+	def glacier(self):
+		return glc.shared_glacier(*self.params)
+
+	# stage transitions of the (shared) glacier, logged once
+	@functools.cached_property
+	def glacier_stage(self):
+		return glacier_stage_monitor(self.glacier)
+
+	@functools.cached_property
+	def air(self):
+		L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4 = self.params
+		return air.shared_air(L_dom, T_N, T_S, T_C, t_0, t_1, t_2, t_3, t_4)
+
+	@functools.cached_property
+	def crust(self):
+		return gia_crust(self.path2data)
 
 # Nomenclature: BC Process_LocationQuantity_Component
 # 					(THM)			(XYZ)
@@ -80,259 +130,223 @@ plotinput = False
 
 # Thermal BCs
 # -----------
-class BCT_SurfaceTemperature(OpenGeoSys.BoundaryCondition):
+class BCT_SurfaceTemperature(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCT_SurfaceTemperature, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.air = air.air(L_dom, T_N, T_S, T_C, t_0, t_1, t_2, t_3, t_4)
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
+		self.glacier_stage(t)
 		
-		print(self.glacier.stagecontrol(t))
-		
-		if x-self.glacier.x_0 > self.glacier.length(t) or self.glacier.length(t)==0.0:
+		l = self.glacier.length(t)
+		if l==0.0:
 			#linear profile from north to south
-			value = self.air.temperature_profile(x,t)
-		else:
-			# prescribe fixed temperature underneath the glacier body
-			value = self.glacier.temperature(x,t)
-		
-		return (True, value)
+			return self.air.temperature_profile(x,t)
+		# prescribe fixed temperature underneath the glacier body
+		return np.where(x-self.glacier.x_0 > l, self.air.temperature_profile(x,t), self.glacier.temperature(x,t))
 
 # Hydraulic BCs
 # -------------
-class BCH_SurfacePressure(OpenGeoSys.BoundaryCondition):
+class BCH_SurfacePressure(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCH_SurfacePressure, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.air = air.air(L_dom, T_N, T_S, T_C, t_0, t_1, t_2, t_3, t_4)
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-
-		print(self.glacier.stagecontrol(t))
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			# height dependent pressure from glacier
-			value = self.glacier.pressure(x,t)
-		else:
-			# fixed pressure from ambient air
-			value = self.air.pressure
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
+		self.glacier_stage(t)
 		
-		return (True, value)
+		# height dependent pressure from glacier, fixed pressure from ambient air
+		return np.where(x-self.glacier.x_0 <= self.glacier.length(t), 
+						self.glacier.pressure(x,t), self.air.pressure)
 
-class BCH_SurfaceHydrohead(OpenGeoSys.BoundaryCondition):
+class BCH_SurfaceHydrohead(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCH_SurfaceHydrohead, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.air = air.air(L_dom, T_N, T_S, T_C, t_0, t_1, t_2, t_3, t_4)
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-
-		print(self.glacier.stagecontrol(t))
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
+		self.glacier_stage(t)
 		# get vertical displacement
 		u_y = self.glacier.local_deflection_heuristic(x,t)
 		
 		# head from surface topology
 		h_top = y/20 + u_y # scaled!
 		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			# height dependent hydraulic head from glacier
-			h_ice = self.glacier.hydrohead(x,t)
-			value = h_ice + h_top
-		else:
-			# fixed head from ambient air
-			h_air = self.air.hydrohead
-			value = h_air + h_top
-		
-		return (True, value)
+		# height dependent hydraulic head from glacier, fixed head from ambient air
+		h_ice = self.glacier.hydrohead(x,t)
+		h_air = self.air.hydrohead
+		return np.where(x-self.glacier.x_0 <= self.glacier.length(t), h_ice + h_top, h_air + h_top)
 
-class BCH_SurfaceInflux(OpenGeoSys.BoundaryCondition):
+class BCH_SurfaceInflux(geosphere, bcb.flux_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCH_SurfaceInflux, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 	
-	def getFlux(self, t, coords, primary_vars): #here Neumann BC: hydraulic flux
-		x, y, z = coords
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			# get hydraulic flux under glacier
-			value = self.glacier.local_meltwater(x,t)
-			derivative = [ 0.0, 0.0 ]
-			return (True, value, derivative)
+	def fluxes(self, t, x, y, z): #here Neumann BC: hydraulic flux
+		# get hydraulic flux under glacier
 		# no BC => free boundary then (no flux)
-		return (False, 0.0, [ 0.0, 0.0 ])
+		active = x-self.glacier.x_0 <= self.glacier.length(t)
+		return active, np.where(active, self.glacier.local_meltwater(x,t), 0.0)
 
-class BCH_SourceFromDeflection(OpenGeoSys.SourceTerm):
+class BCH_SourceFromDeflection(geosphere, bcb.flux_batch, OpenGeoSys.SourceTerm):
+	source_term = True
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCH_SourceFromDeflection, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 		if plotinput: self.glacier.plot_deflection()
 
-	def getFlux(self, t, coords, primary_vars):
-		x, y, z = coords
-		
+	def fluxes(self, t, x, y, z):
 		# get subsidence velocity acting as a hydraulic head source term
-		value = self.glacier.local_deflection_rate_heuristic(x,t)
-		Jac = [0.0, 0.0]
-		return (value, Jac)
+		if not deflectionGIA:
+			return self.glacier.local_deflection_rate_heuristic(x,t)
+		# GIA rate table in m/ka
+		t_in_ka = t/s_a/1000
+		return self.crust.interpolate_vy(x, y/y_sfactor, t_in_ka) / (1000*s_a)
 
 
 # Mechanics BCs
 # -------------
-class BCM_SurfaceTraction_X(OpenGeoSys.BoundaryCondition):
+class BCM_SurfaceTraction_X(geosphere, bcb.flux_batch, OpenGeoSys.BoundaryCondition):
 	
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCM_SurfaceTraction_X, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 		if plotinput: self.glacier.print_max_load()
 		if plotinput: self.glacier.plot_evolution()
 		
-	def getFlux(self, t, coords, primary_vars): #here Neumann BC: flux of linear momentum
-		x, y, z = coords
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			value = self.glacier.tangentialstress(x,t)
-			derivative = [ 0.0, 0.0 ]
-			return (True, value, derivative)
+	def fluxes(self, t, x, y, z): #here Neumann BC: flux of linear momentum
 		# no BC => free boundary then (no flux)
-		return (False, 0.0, [ 0.0, 0.0 ])
+		active = x-self.glacier.x_0 <= self.glacier.length(t)
+		return active, np.where(active, self.glacier.tangentialstress(x,t), 0.0)
 
-class BCM_SurfaceTraction_Y(OpenGeoSys.BoundaryCondition):
+class BCM_SurfaceTraction_Y(geosphere, bcb.flux_batch, OpenGeoSys.BoundaryCondition):
 	
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCM_SurfaceTraction_Y, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 
-	def getFlux(self, t, coords, primary_vars): #here Neumann BC: flux of linear momentum
-		x, y, z = coords
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			value = self.glacier.normalstress(x,t)
-			derivative = [ 0.0, 0.0,   ]
-			return (True, value, derivative)
+	def fluxes(self, t, x, y, z): #here Neumann BC: flux of linear momentum
 		# no BC => free boundary then (no flux)
-		return (False, 0.0, [ 0.0, 0.0,   ])
+		active = x-self.glacier.x_0 <= self.glacier.length(t)
+		return active, np.where(active, self.glacier.normalstress(x,t), 0.0)
 
-class BCM_BottomDeflection(OpenGeoSys.BoundaryCondition):
+class BCM_BottomDeflection(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCM_BottomDeflection, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 		if plotinput: self.glacier.plot_deflection()
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-		
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
 		# prescribe displacement u_y
 		# scale here with 20 !TODO!
-		value = 20 * self.glacier.local_deflection(x,t)
-		
-		return (True, value)
+		return 20 * self.glacier.local_deflection(x,t)
 
-class BCM_DomainDisplacement(OpenGeoSys.BoundaryCondition):
+class BCM_DomainDisplacement(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4):
 		super(BCM_DomainDisplacement, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+		# parameters of the external geosphere
+		self.params = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
 		if plotinput: self.glacier.plot_deflection()
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-		
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
 		# prescribe displacement u_y
 		# scale here with 20 !TODO!
-		value = 20 * self.glacier.local_displacement_heuristic(x,y,t)
-		
-		return (True, value)
+		return 20 * self.glacier.local_displacement_heuristic(x,y,t)
 
-class BCM_BottomDisplacement_X(OpenGeoSys.BoundaryCondition):
+class BCM_BottomDisplacement_X(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, path2data):
 		super(BCM_BottomDisplacement_X, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(path2data)
+		# external geosphere: GIA data (see gia_crust)
+		self.path2data = path2data
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-		
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
 		# prescribe displacement u_x
 		t_in_ka = t/s_a/1000
 		# ?TODO? y_scale = y/20
-		value = self.crust.interpolateX_data_uxuy(x,y,t_in_ka)[0]
-		
-		return (True, value)
+		return self.crust.bottom.component(0, x, y, t_in_ka)
 
-class BCM_BottomDisplacement_Y(OpenGeoSys.BoundaryCondition):
+class BCM_BottomDisplacement_Y(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, path2data):
 		super(BCM_BottomDisplacement_Y, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(path2data)
+		# external geosphere: GIA data (see gia_crust)
+		self.path2data = path2data
 		if plotinput:
 			idx = 3
 			tRange = np.linspace(t_0/s_a/1000, t_1/s_a/1000, 26)
 			self.crust.ylineplot_evolution_uxuy(idx, tRange)
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-		
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
 		# prescribe displacement u_y
 		t_in_ka = t/s_a/1000
 		# ?TODO? y_scale = y/20
-		value = self.crust.interpolateX_data_uxuy(x,y,t_in_ka)[1]
-		
-		return (True, value)
+		return self.crust.bottom.component(1, x, y, t_in_ka)
 
-class BCM_LateralDisplacement_X(OpenGeoSys.BoundaryCondition):
+class BCM_LateralDisplacement_X(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, path2data):
 		super(BCM_LateralDisplacement_X, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(path2data)
+		# external geosphere: GIA data (see gia_crust)
+		self.path2data = path2data
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-		
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
 		# prescribe displacement u_x
 		t_in_ka = t/s_a/1000
 		y_scale = y/20
-		value = self.crust.interpolateY_data_uxuy(x,y_scale,t_in_ka)[0]
-		
-		return (True, value)
+		return self.crust.lateral.component(0, x, y_scale, t_in_ka)
 
-class BCM_LateralDisplacement_Y(OpenGeoSys.BoundaryCondition):
+class BCM_LateralDisplacement_Y(geosphere, bcb.nodal_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self, path2data):
 		super(BCM_LateralDisplacement_Y, self).__init__()
-		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(path2data)
+		# external geosphere: GIA data (see gia_crust)
+		self.path2data = path2data
 
-	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
-		x, y, z = coords
-		
+	# all boundary nodes at once
+	def values(self, t, x, y, z):
 		# prescribe displacement u_y
 		t_in_ka = t/s_a/1000
 		y_scale = y/20
-		value = self.crust.interpolateY_data_uxuy(x,y_scale,t_in_ka)[1]
-		
-		return (True, value)
+		return self.crust.lateral.component(1, x, y_scale, t_in_ka)
+
+
+# Replay of offline tables
+# -------------------------
+class BC_TableReplay(bct.replay, OpenGeoSys.BoundaryCondition):
+	pass
+
+class ST_TableReplay(bct.replay, OpenGeoSys.SourceTerm):
+	pass
+
+# replay object matching the BC it replaces
+def replay_object(bc, prefix):
+	if isinstance(bc, OpenGeoSys.SourceTerm):
+		return ST_TableReplay(prefix, True)
+	return BC_TableReplay(prefix)
 
 
 # instantiate the BC objects used by OpenGeoSys
@@ -340,33 +354,59 @@ class BCM_LateralDisplacement_Y(OpenGeoSys.BoundaryCondition):
 # Naming convention:
 # bc_Process_(external)origin_boundary_type(_coefficient)
 
-# Cryosphere BCs
-bc_T_glacier_above_Dirichlet = BCT_SurfaceTemperature(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_H_glacier_above_Dirichlet = BCH_SurfacePressure(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_H_glacier_above_Dirichlet_head = BCH_SurfaceHydrohead(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_H_glacier_above_VolSource_head = BCH_SourceFromDeflection(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_H_glacier_above_Neumann   = BCH_SurfaceInflux(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_M_glacier_above_Neumann_x = BCM_SurfaceTraction_X(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_M_glacier_above_Neumann_y = BCM_SurfaceTraction_Y(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-#bc_H_glacier_north_Neumann
-
-# Lithosphere BCs
-bc_M_crustal_south_Dirichlet_x = BCM_LateralDisplacement_X(path2data)
-bc_M_crustal_south_Dirichlet_y = BCM_LateralDisplacement_Y(path2data)
-bc_M_crustal_below_Dirichlet_x = BCM_BottomDisplacement_X(path2data)
-bc_M_crustal_below_Dirichlet_y = BCM_BottomDisplacement_Y(path2data)
-#bc_M_crustal_below_Dirichlet_y = BCM_BottomDeflection(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-#bc_M_glacier_above_Dirichlet_y = BCM_BottomDeflection(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_M_glacier_above_Dirichlet_y = BCM_DomainDisplacement(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-#bc_M_crustal_north
-#bc_M_crustal_aside
-
-# just for downward compatibility
-bc_thermally_dirichlet = BCT_SurfaceTemperature(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_hydraulic_dirichlet = BCH_SurfacePressure(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_hydraulic_neumann   = BCH_SurfaceInflux(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_mechanics_neumann_x = BCM_SurfaceTraction_X(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_mechanics_neumann_y = BCM_SurfaceTraction_Y(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-bc_mechanics_dirichlet = BCM_BottomDeflection(L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
-
-bc_y = BCM_SurfaceTraction_Y(L_dom, L_max, H_max, x_0, t_0, t_1, 0, 0, 0)
+glacial = (L_dom, L_max, H_max, x_0, t_0, t_1, t_2, t_3, t_4)
+
+# BC objects by name, built on first request
+bc_factories = {
+	# Cryosphere BCs
+	'bc_T_glacier_above_Dirichlet': lambda: BCT_SurfaceTemperature(*glacial),
+	'bc_H_glacier_above_Dirichlet': lambda: BCH_SurfacePressure(*glacial),
+	'bc_H_glacier_above_Dirichlet_head': lambda: BCH_SurfaceHydrohead(*glacial),
+	'bc_H_glacier_above_VolSource_head': lambda: BCH_SourceFromDeflection(*glacial),
+	'bc_H_glacier_above_Neumann':   lambda: BCH_SurfaceInflux(*glacial),
+	'bc_M_glacier_above_Neumann_x': lambda: BCM_SurfaceTraction_X(*glacial),
+	'bc_M_glacier_above_Neumann_y': lambda: BCM_SurfaceTraction_Y(*glacial),
+	#bc_H_glacier_north_Neumann
+
+	# Lithosphere BCs
+	'bc_M_crustal_south_Dirichlet_x': lambda: BCM_LateralDisplacement_X(path2data),
+	'bc_M_crustal_south_Dirichlet_y': lambda: BCM_LateralDisplacement_Y(path2data),
+	'bc_M_crustal_below_Dirichlet_x': lambda: BCM_BottomDisplacement_X(path2data),
+	'bc_M_crustal_below_Dirichlet_y': lambda: BCM_BottomDisplacement_Y(path2data),
+	#'bc_M_crustal_below_Dirichlet_y': lambda: BCM_BottomDeflection(*glacial),
+	#'bc_M_glacier_above_Dirichlet_y': lambda: BCM_BottomDeflection(*glacial),
+	'bc_M_glacier_above_Dirichlet_y': lambda: BCM_DomainDisplacement(*glacial),
+	#bc_M_crustal_north
+	#bc_M_crustal_aside
+
+	# just for downward compatibility
+	'bc_thermally_dirichlet': lambda: BCT_SurfaceTemperature(*glacial),
+	'bc_hydraulic_dirichlet': lambda: BCH_SurfacePressure(*glacial),
+	'bc_hydraulic_neumann':   lambda: BCH_SurfaceInflux(*glacial),
+	'bc_mechanics_neumann_x': lambda: BCM_SurfaceTraction_X(*glacial),
+	'bc_mechanics_neumann_y': lambda: BCM_SurfaceTraction_Y(*glacial),
+	'bc_mechanics_dirichlet': lambda: BCM_BottomDeflection(*glacial),
+
+	'bc_y': lambda: BCM_SurfaceTraction_Y(L_dom, L_max, H_max, x_0, t_0, t_1, 0, 0, 0),
+}
+
+@functools.lru_cache(maxsize=None)
+def bc_object(name):
+	bc = bc_factories[name]()
+	if name in replay_tables:
+		bc = replay_object(bc, replay_tables[name])
+	return instr.instrument_bc(name, bc)
+
+instr.instrument_models({'glacier': [glc.glacier], 'air': [air.air], 
+						 'crust': [crc.crust, crc.nested_crust, crc.grid2D, crc.displacement_pair]})
+
+# imported as module: BC objects resolve lazily as module attributes
+def __getattr__(name):
+	if name in bc_factories:
+		return bc_object(name)
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# OpenGeoSys runs this file as script and looks the BC objects up in its globals:
+# bind all names there, the objects are cheap as the geosphere models are built on first use
+if __name__ == "__main__":
+	globals().update({name: bc_object(name) for name in bc_factories})
@@ -8,6 +8,10 @@ import glacierclass_AREHS as glc	# glacier
 import crustclass_AREHS as crc 	# earth crust
 import repoclass_AREHS as dgr	# repository
 import airclass_AREHS as air		# atmosphere
+import bcbaseclass as bcb		# cached and batch evaluation
+import diagnostics as diag		# logging
+import instrumentation as instr	# optional profiling
+import bctable as bct			# offline tables
 
 import numpy as np
 
@@ -26,20 +30,22 @@ from constants_AREHS import *
 # ---------------------------------------------------------
 # Thermal BCs
 # ---------------------------------------------------------
-class BCT_SurfaceTemperature(OpenGeoSys.BoundaryCondition):
+class BCT_SurfaceTemperature(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCT_SurfaceTemperature, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.air = air.air(T_ini, T_min, t_)
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_)
+		self.air = air.air(T_ini, T_min, t_, harmonics_T)
+		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_, harmonics_H)
+		self.air_stage = diag.stage_monitor('air', self.air.tcr.stage_control)
 		if plotinput:
 			self.air.plot_evolution()
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
 		
-		print(self.air.tcr.stage_control(t))
+		self.air_stage(t)
 		
 		if x-self.glacier.x_0 > self.glacier.length(t) or self.glacier.length(t)==0.0:
 			#linear profile from north to south
@@ -50,12 +56,13 @@ class BCT_SurfaceTemperature(OpenGeoSys.BoundaryCondition):
 		
 		return (True, value)
 
-class BCT_SurfaceTemperature_const(OpenGeoSys.BoundaryCondition):
+class BCT_SurfaceTemperature_const(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCT_SurfaceTemperature_const, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.air = air.air(T_ini, T_min, t_)
+		self.air = air.air(T_ini, T_min, t_, harmonics_T)
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
@@ -64,40 +71,54 @@ class BCT_SurfaceTemperature_const(OpenGeoSys.BoundaryCondition):
 		
 		return (True, value)
 
-class BCT_SourceFromRepository(OpenGeoSys.SourceTerm):
+class BCT_SourceFromRepository(bcb.flux_batch, OpenGeoSys.SourceTerm):
+	source_term = True
+	flux_derivative = [0.0]
 
 	def __init__(self):
 		super(BCT_SourceFromRepository, self).__init__()
 		# instantiate member objects of the external geosphere
 		self.repo = dgr.repo(BE_Q, BE_z, BE_f, HA_Q, HA_z, HA_f, BE_vol, HA_vol, 
-							 lrepo, t_inter_BE, t_inter_HA, t_filled)
+							 lrepo, t_inter_BE, t_inter_HA, t_filled, averaged_source, t_start)
+		# emplacement zones, all fed by the same repository model
+		if path2zones is None:
+			zones = [(xrmin, xrmax, yrmin, yrmax)]
+		else:
+			zones = dgr.read_zones(path2zones)
+		self.layout = dgr.layout(zones, [self.repo]*len(zones))
+		# or each zone by its own canisters
+		if path2inventory is not None:
+			self.inventory = dgr.inventory(waste_classes, *dgr.read_inventory(path2inventory), 
+										   self.layout.lengths, t_filled, averaged_source, t_start)
+			self.layout.sources = self.inventory.sources()
 		if plotinput:
 			self.repo.print_max_load()
 			self.repo.plot_evolution()
 
-	def getFlux(self, t, coords, primary_vars):
-		x, y, z = coords
-		
-		value = 0
-		if ((xrmin <= x <= xrmax) and (yrmin <= y <= yrmax)):
-			print("y = ",y)
-			value = self.repo.radioactive_heatflux(t)
-		
-		derivative = [0.0]
-		return (value, derivative)	
+	def fluxes(self, t, x, y, z):
+		zone_ids, values = self.layout.heatsources(x, y, t)
+		return values
+
+	# registered points: zones located once, then only indexed per time step
+	def points_registered(self):
+		x, y, z = self.flux_points
+		self.batch_zone_ids = self.layout.zone_ids(x, y)
+
+	def batch_fluxes(self, t):
+		return self.layout.zone_values(t)[self.batch_zone_ids]
 
 class BCT_BottomHeatFlux(OpenGeoSys.BoundaryCondition):
 
 	def __init__(self):
 		super(BCT_BottomHeatFlux, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(q_geo)
+		self.crust = crc.crust(q_geo, path2data)
 
 	def getFlux(self, t, coords, primary_vars): #here Neumann BC: flux of heat
 		x, y, z = coords
 		
 		# get heat flux component
-		value = self.crust.geothermal_heatflux()[1]
+		value = self.crust.geothermal_heatflux(x,z)[1]
 		derivative = [0.0]
 		return (True, value, derivative)	
 
@@ -105,18 +126,20 @@ class BCT_BottomHeatFlux(OpenGeoSys.BoundaryCondition):
 # ------------------------------------------------------
 # Hydraulic BCs
 # ------------------------------------------------------
-class BCH_SurfacePressure(OpenGeoSys.BoundaryCondition):
+class BCH_SurfacePressure(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCH_SurfacePressure, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.air = air.air(T_ini, T_min, t_)
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_)
+		self.air = air.air(T_ini, T_min, t_, harmonics_T)
+		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_, harmonics_H)
+		self.glacier_stage = diag.stage_monitor('glacier', self.glacier.tcr_h.stage_control)
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
 
-		print(self.glacier.stagecontrol(t))
+		self.glacier_stage(t)
 		
 		if x-self.glacier.x_0 <= self.glacier.length(t):
 			# height dependent pressure from glacier
@@ -127,72 +150,58 @@ class BCH_SurfacePressure(OpenGeoSys.BoundaryCondition):
 		
 		return (True, value)
 
-class BCH_SurfaceInflux(OpenGeoSys.BoundaryCondition):
+class BCH_SurfaceInflux(bcb.flux_batch, OpenGeoSys.BoundaryCondition):
 
 	def __init__(self):
 		super(BCH_SurfaceInflux, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_)
+		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_, harmonics_H)
 	
-	def getFlux(self, t, coords, primary_vars): #here Neumann BC: hydraulic flux
-		x, y, z = coords
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			# get hydraulic flux under glacier
-			value = self.glacier.local_meltwater(x,t)
-			derivative = [ 0.0, 0.0 ]
-			return (True, value, derivative)
+	def fluxes(self, t, x, y, z): #here Neumann BC: hydraulic flux
+		# get hydraulic flux under glacier
 		# no BC => free boundary then (no flux)
-		return (False, 0.0, [ 0.0, 0.0 ])
+		active = x-self.glacier.x_0 <= self.glacier.length(t)
+		return active, np.where(active, self.glacier.local_meltwater(x,t), 0.0)
 
 
 # --------------------------------------------------------
 # Mechanics BCs
 # --------------------------------------------------------
-class BCM_SurfaceTraction_X(OpenGeoSys.BoundaryCondition):
+class BCM_SurfaceTraction_X(bcb.flux_batch, OpenGeoSys.BoundaryCondition):
 	
 	def __init__(self):
 		super(BCM_SurfaceTraction_X, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_)
+		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_, harmonics_H)
 		if plotinput:
 			self.glacier.print_max_load()
 			self.glacier.plot_evolution()
 			self.glacier.plot_evolving_shape()
 		
-	def getFlux(self, t, coords, primary_vars): #here Neumann BC: flux of linear momentum
-		x, y, z = coords
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			value = self.glacier.tangentialstress(x,t)
-			derivative = [ 0.0, 0.0 ]
-			return (True, value, derivative)
+	def fluxes(self, t, x, y, z): #here Neumann BC: flux of linear momentum
 		# no BC => free boundary then (no flux)
-		return (False, 0.0, [ 0.0, 0.0 ])
+		active = x-self.glacier.x_0 <= self.glacier.length(t)
+		return active, np.where(active, self.glacier.tangentialstress(x,t), 0.0)
 
-class BCM_SurfaceTraction_Y(OpenGeoSys.BoundaryCondition):
+class BCM_SurfaceTraction_Y(bcb.flux_batch, OpenGeoSys.BoundaryCondition):
 	
 	def __init__(self):
 		super(BCM_SurfaceTraction_Y, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_)
+		self.glacier = glc.glacier(L_dom, L_max, H_max, x_0, t_, harmonics_H)
 
-	def getFlux(self, t, coords, primary_vars): #here Neumann BC: flux of linear momentum
-		x, y, z = coords
-		
-		if x-self.glacier.x_0 <= self.glacier.length(t):
-			value = self.glacier.normalstress(x,t)
-			derivative = [ 0.0, 0.0,   ]
-			return (True, value, derivative)
+	def fluxes(self, t, x, y, z): #here Neumann BC: flux of linear momentum
 		# no BC => free boundary then (no flux)
-		return (False, 0.0, [ 0.0, 0.0,   ])
+		active = x-self.glacier.x_0 <= self.glacier.length(t)
+		return active, np.where(active, self.glacier.normalstress(x,t), 0.0)
 
-class BCM_BottomDisplacement_X(OpenGeoSys.BoundaryCondition):
+class BCM_BottomDisplacement_X(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCM_BottomDisplacement_X, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(q_geo)
+		self.crust = crc.crust(q_geo, path2data)
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
@@ -202,12 +211,13 @@ class BCM_BottomDisplacement_X(OpenGeoSys.BoundaryCondition):
 		
 		return (True, value)
 
-class BCM_BottomDisplacement_Y(OpenGeoSys.BoundaryCondition):
+class BCM_BottomDisplacement_Y(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCM_BottomDisplacement_Y, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(q_geo)
+		self.crust = crc.crust(q_geo, path2data)
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
@@ -217,12 +227,13 @@ class BCM_BottomDisplacement_Y(OpenGeoSys.BoundaryCondition):
 		
 		return (True, value)
 
-class BCM_LateralDisplacement_X(OpenGeoSys.BoundaryCondition):
+class BCM_LateralDisplacement_X(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCM_LateralDisplacement_X, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(q_geo)
+		self.crust = crc.crust(q_geo, path2data)
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
@@ -232,22 +243,39 @@ class BCM_LateralDisplacement_X(OpenGeoSys.BoundaryCondition):
 		
 		return (True, value)
 
-class BCM_LateralDisplacement_Y(OpenGeoSys.BoundaryCondition):
+class BCM_LateralDisplacement_Y(bcb.nodal_cache, OpenGeoSys.BoundaryCondition):
+	depends_on_primary_vars = False
 
 	def __init__(self):
 		super(BCM_LateralDisplacement_Y, self).__init__()
 		# instantiate member objects of the external geosphere
-		self.crust = crc.crust(q_geo)
+		self.crust = crc.crust(q_geo, path2data)
 
 	def getDirichletBCValue(self, t, coords, node_id, primary_vars):
 		x, y, z = coords
 		
 		# prescribe displacement u_y
-		value = self.crust.displacement_aside(x,y,z,t)[0]
+		value = self.crust.displacement_aside(x,y,z,t)[1]
 		
 		return (True, value)
 
 
+# ---------------------------------------------
+# Replay of offline tables
+# ---------------------------------------------
+class BC_TableReplay(bct.replay, OpenGeoSys.BoundaryCondition):
+	pass
+
+class ST_TableReplay(bct.replay, OpenGeoSys.SourceTerm):
+	pass
+
+# replay object matching the BC it replaces
+def replay_object(bc, prefix):
+	if isinstance(bc, OpenGeoSys.SourceTerm):
+		return ST_TableReplay(prefix, True)
+	return BC_TableReplay(prefix)
+
+
 # ---------------------------------------------
 # instantiate the BC objects used by OpenGeoSys
 # ---------------------------------------------
@@ -276,3 +304,14 @@ bc_M_crustal_below_Dirichlet_y = BCM_BottomDisplacement_Y()
 #bc_M_crustal_north
 #bc_M_crustal_aside
 
+# BCs served from offline tables
+for name, prefix in replay_tables.items():
+	globals()[name] = replay_object(globals()[name], prefix)
+
+# optional profiling of the BC objects and geosphere models
+instr.instrument_models({'glacier': [glc.glacier], 'air': [air.air], 
+						 'crust': [crc.crust, crc.heatflux_map, crc.gia.crust, crc.gia.nested_crust, crc.gia.grid2D],
+						 'repo': [dgr.repo, dgr.layout, dgr.inventory, dgr.zone_source]})
+for name, bc in list(globals().items()):
+	if name.startswith('bc_'):
+		instr.instrument_bc(name, bc)
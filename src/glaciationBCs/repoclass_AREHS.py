@@ -1,18 +1,61 @@
 # Data model of the evolving deep geological repository (thermal field)
 # Physical units: kg, m, s, K
 
+import bisect
 import numpy as np
-import matplotlib.pyplot as plt
 
 from math import exp
-from constants_AREHS import s_a
+from constants_AREHS import s_a, eps
+
+
+# heat source density of the repository from its heat flow, 2D scaling:
+# sqrt of the heat flow in W per repository length in m (TODO: remove sqrt for 3D)
+def source_density(flow, size):
+	return np.sqrt(flow) / size
+
+# mean of f(t) over [t1, t2] by Gauss-Legendre quadrature (the scaled source is not
+# linear in the decay terms), piecewise between the (sorted) breaks, e.g. emplacement times
+gauss_order = 16
+gauss_points, gauss_weights = np.polynomial.legendre.leggauss(gauss_order)
+
+def step_average(f, t1, t2, breaks=[]):
+	if t2 <= t1:
+		return f(t2)
+	bounds = [t1] + breaks[bisect.bisect_right(breaks, t1):bisect.bisect_left(breaks, t2)] + [t2]
+	total = 0.0
+	for a, b in zip(bounds[:-1], bounds[1:]):
+		values = np.array([f(s) for s in ((a+b)/2 + (b-a)/2*gauss_points).tolist()])
+		total = total + (b-a)/2 * (gauss_weights @ values)
+	return total / (t2-t1)
+
+
+class time_step():
+	# tracks the interval [t_prev, t] of the current time step from the times OGS passes in,
+	# the first step starts at the model start time t_start
+
+	def __init__(self, t_start=0.0):
+		self.t_prev = None
+		self.t = t_start
+
+	def update(self, t):
+		if t > self.t:
+			# new time step
+			self.t_prev, self.t = self.t, t
+		elif t < self.t:
+			# step repeated with reduced size
+			self.t = t
+			if self.t_prev is not None and t <= self.t_prev:
+				self.t_prev = None
+		# at t_start: no interval
+		return t if self.t_prev is None else self.t_prev
+
 
 class repo():
 	# class variables:
 	# -
 		
 	# constructor
-	def __init__(self, BE_Q, BE_z, BE_f, HA_Q, HA_z, HA_f, BE_vol, HA_vol, dgr_area, t_inter_BE, t_inter_HA, t_filled):
+	def __init__(self, BE_Q, BE_z, BE_f, HA_Q, HA_z, HA_f, BE_vol, HA_vol, dgr_area, t_inter_BE, t_inter_HA, t_filled, averaged=False, t_start=0.0):
 		# instance variables: owned by instances of the class, can be different for each instance
 		# parameters RK-BE
 		self.BE_Q = BE_Q
@@ -34,22 +77,51 @@ class repo():
 		self.t_inter_BE = t_inter_BE
 		self.t_inter_HA = t_inter_HA
 		self.t_filled = t_filled
+
+		# stepwise filling: batches emplaced every 4 years
+		self.t_batches = np.arange(0,80,4) * s_a
+		# collapsed decay sums: heat flow = sum_j coeffs[j] * exp(-decay[j]*t)
+		# the filling sum factorizes per decay constant z into a geometric series sum_i exp(z*t_i)
+		BE_coeffs = [Q * np.exp(-z*t_inter_BE) * np.sum(np.exp(z*self.t_batches)) * BE_vol*BE_f
+					 for Q, z in zip(BE_Q, BE_z)]
+		HA_coeffs = [Q * np.exp(-z*t_inter_HA) * np.sum(np.exp(z*self.t_batches)) * HA_vol*HA_f
+					 for Q, z in zip(HA_Q, HA_z)]
+		self.coeffs = [float(c) for c in BE_coeffs + HA_coeffs]
+		self.decay = [float(z) for z in list(BE_z) + list(HA_z)]
+		self.memo_t = None
+		self.memo_value = None
+		# optional: source averaged over the current time step
+		self.averaged = averaged
+		self.step = time_step(t_start)
+		self.average_memo = (None, None, None)
 		
 	def radioactive_heatflow(self,t): # heat flow = Wärmestrom
+		if isinstance(t, np.ndarray):
+			return sum(c * np.exp(-z*t) for c, z in zip(self.coeffs, self.decay))
+		# memoized per time: all points of a time step share the value
+		if t != self.memo_t:
+			self.memo_t = t
+			self.memo_value = sum(c * exp(-z*t) for c, z in zip(self.coeffs, self.decay))
+		return self.memo_value
 
-		Q_BE = lambda t: np.sum([self.BE_Q[i]*np.exp(-t*self.BE_z[i]) for i in range(5)]) 
-		Q_HA = lambda t: np.sum([self.HA_Q[i]*np.exp(-t*self.HA_z[i]) for i in range(5)]) 
-		# stepwise filling of RK-BE
-		Qsum_BE = np.sum([Q_BE(t-i*s_a + self.t_inter_BE) for i in range(0,80,4)])
-		Qsum_HA = np.sum([Q_HA(t-i*s_a + self.t_inter_HA) for i in range(0,80,4)])
-		
-		return Qsum_BE*self.BE_vol*self.BE_f + Qsum_HA*self.HA_vol*self.HA_f
+	# heat flux density at the repository time t
+	def scaled_heatflux(self, t):
+		return source_density(self.radioactive_heatflow(t), self.dgr_area)
+
+	# mean heat flux density over [t1, t2] of the repository time, once per step
+	def average_heatflux(self, t1, t2):
+		if (t1, t2) != self.average_memo[:2]:
+			self.average_memo = (t1, t2, step_average(self.scaled_heatflux, t1, t2))
+		return self.average_memo[2]
 
 	def radioactive_heatflux(self,t): # heat flux = Wärmestromdichte!
+		if self.averaged:
+			t_prev = self.step.update(t)
+			# the scaled source is averaged, as OGS integrates it
+			return self.average_heatflux(self.t_filled + t_prev, self.t_filled + t)
 		# shift time to when the dgr is filled completely
 		t = self.t_filled + t
-		# TODO: remove sqrt for 3D
-		return np.sqrt(self.radioactive_heatflow(t)) / self.dgr_area #TODO line start and endpoint
+		return self.scaled_heatflux(t) #TODO line start and endpoint
 
 
 	# auxiliary functions
@@ -58,11 +130,12 @@ class repo():
 		print(self.radioactive_heatflow(self.t_filled), "W")
 	
 	def plot_evolution(self):
+		import matplotlib.pyplot as plt
 		time_ = np.linspace(self.t_filled , 10000*s_a, 1000)
 
 		plt.figure(figsize=(12,6))
 		plt.title('Gesamtwärmeleistung der Abfälle (RK-BE + RK-HA)\n nach vollständiger Einlagerung')
-		plt.plot(time_/s_a, [self.radioactive_heatflow(ti)/1000 for ti in time_], 
+		plt.plot(time_/s_a, self.radioactive_heatflow(time_)/1000, 
 			label='RK-BE + RK-HA stufenweise befüllt', color = 'red', lw = 2.5)
 		plt.semilogx()
 		plt.xlim(10,10000)
@@ -74,3 +147,184 @@ class repo():
 		plt.savefig("repo_test.png")
 		# plt.show()
 
+
+
+# canister inventory as rows of (emplacement time [a], waste class, zone id, volume [m³])
+# emplacement times count from the start of the filling, as the batches of repo
+def read_inventory(filename):
+	inv = np.atleast_2d(np.loadtxt(filename, comments='#'))
+	return inv[:,0]*s_a, inv[:,1].astype(int), inv[:,2].astype(int), inv[:,3]
+
+
+class inventory():
+	# heat output of individually emplaced canisters, grouped by zone and decay constant:
+	# zone heat flow = sum_z exp(-z*(t-t_ref)) * sum_(canisters emplaced until t) c*exp(z*(tau-t_ref))
+	# times of the inventory count from the start of the filling, model time t is t_filled + t
+	# (as in repo), the heat flux uses the scaling of repo with the zone sizes
+
+	# constructor
+	def __init__(self, waste_classes, t_emplaced, waste_class, zone_id, volume, zone_size, t_filled=0.0, averaged=False, t_start=0.0):
+		# waste_classes: [(Q [W/m³], z [1/s], f, t_inter), ...] per waste class
+		self.t_filled = t_filled
+		t_emplaced = np.asarray(t_emplaced, dtype=float)
+		zone_id = np.asarray(zone_id, dtype=int)
+		self.zone_size = np.asarray(zone_size, dtype=float)
+		self.nzones = len(self.zone_size)
+		if zone_id.size and (zone_id.min() < 0 or zone_id.max() >= self.nzones):
+			raise ValueError("canister zone id outside the repository layout")
+		# decay groups: distinct decay constants of all waste classes
+		self.decay = np.unique(np.concatenate([np.asarray(wc[1], dtype=float) for wc in waste_classes]))
+		# heat per canister and decay group at its emplacement (interim storage decayed already)
+		class_coeffs = np.zeros((len(waste_classes), len(self.decay)))
+		for i, (Q, z, f, t_inter) in enumerate(waste_classes):
+			for Qk, zk in zip(Q, z):
+				class_coeffs[i, np.searchsorted(self.decay, zk)] += Qk * f * np.exp(-zk*t_inter)
+		coeffs = class_coeffs[np.asarray(waste_class, dtype=int)] * np.asarray(volume, dtype=float)[:,None]
+		# reference time: last emplacement, keeps exp(z*(tau-t_ref)) <= 1
+		self.t_ref = t_emplaced.max() if t_emplaced.size else 0.0
+		weighted = coeffs * np.exp(self.decay * (t_emplaced[:,None] - self.t_ref))
+		# aggregated matrix (zones x decay groups) once everything is emplaced
+		self.A = np.zeros((self.nzones, len(self.decay)))
+		np.add.at(self.A, zone_id, weighted)
+		# per zone prefix sums in order of emplacement for the filling period
+		self.t_zone = []
+		self.prefix = []
+		zero = np.zeros((1, len(self.decay)))
+		for i in range(self.nzones):
+			sel = np.nonzero(zone_id == i)[0]
+			order = sel[np.argsort(t_emplaced[sel], kind='stable')]
+			self.t_zone.append(t_emplaced[order])
+			self.prefix.append(np.vstack([zero, np.cumsum(weighted[order], axis=0)]))
+		self.memo_t = None
+		self.memo_value = None
+		# optional: source averaged over the current time step
+		self.averaged = averaged
+		self.step = time_step(t_start)
+		# emplacements split the step averages (the heat flow jumps)
+		self.t_breaks = np.unique(t_emplaced).tolist()
+
+	# heat flow per zone in W (vectorized over zones)
+	def zone_heatflow(self, t):
+		e = np.exp(-self.decay * (t - self.t_ref))
+		if t >= self.t_ref:
+			return self.A @ e
+		return np.array([self.prefix[i][np.searchsorted(self.t_zone[i], t, side='right')] @ e 
+						 for i in range(self.nzones)])
+
+	# heat flux density per zone at the inventory time t
+	def zone_scaled_heatflux(self, t):
+		return source_density(self.zone_heatflow(t), self.zone_size)
+
+	# heat flux density per zone at model time t, memoized per time
+	def zone_heatflux(self, t):
+		if t != self.memo_t:
+			self.memo_t = t
+			if self.averaged:
+				t1 = self.t_filled + self.step.update(t)
+				t2 = self.t_filled + t
+				self.memo_value = step_average(self.zone_scaled_heatflux, t1, t2, self.t_breaks)
+			else:
+				self.memo_value = self.zone_scaled_heatflux(self.t_filled + t)
+		return self.memo_value
+
+	# heat sources of the single zones, e.g. for a repository layout
+	def sources(self):
+		return [zone_source(self, i) for i in range(self.nzones)]
+
+
+class zone_source():
+	# view on one zone of an inventory
+
+	def __init__(self, inventory, zone_id):
+		self.inventory = inventory
+		self.zone_id = zone_id
+
+	def radioactive_heatflux(self, t):
+		return self.inventory.zone_heatflux(t)[self.zone_id]
+
+
+# emplacement zones as rows of (xmin, xmax, ymin, ymax)
+def read_zones(filename):
+	return np.atleast_2d(np.loadtxt(filename, comments='#'))[:,:4]
+
+
+class layout():
+	# geometry of the repository: many rectangular emplacement zones (drifts, fields)
+	# each with its own heat source, held in a uniform bin grid for point location
+
+	# constructor
+	def __init__(self, zones, sources, nbins=None):
+		self.zones = np.atleast_2d(np.asarray(zones, dtype=float))
+		if len(sources) != len(self.zones):
+			raise ValueError("one heat source per emplacement zone required")
+		self.sources = list(sources)
+		n = len(self.zones)
+		self.areas = (self.zones[:,1] - self.zones[:,0]) * (self.zones[:,3] - self.zones[:,2])
+		# zone size in the 2D scaling of the heat source: length along the repository line (cf. lrepo)
+		self.lengths = self.zones[:,1] - self.zones[:,0]
+		# bin grid over the bounding box, about one zone per bin
+		if nbins is None:
+			nbins = max(1, int(np.ceil(np.sqrt(n))))
+		self.nbins = nbins
+		self.x0 = self.zones[:,0].min()
+		self.y0 = self.zones[:,2].min()
+		self.dx = max(self.zones[:,1].max() - self.x0, eps) / nbins
+		self.dy = max(self.zones[:,3].max() - self.y0, eps) / nbins
+		self.bins = [[[] for ix in range(nbins)] for iy in range(nbins)]
+		ix1, ix2 = self.bin_index(self.zones[:,0], self.zones[:,1], self.x0, self.dx)
+		iy1, iy2 = self.bin_index(self.zones[:,2], self.zones[:,3], self.y0, self.dy)
+		for i in range(n):
+			for iy in range(iy1[i], iy2[i]+1):
+				for ix in range(ix1[i], ix2[i]+1):
+					self.bins[iy][ix].append(i)
+		# the mesh does not move: point -> zone id per node coordinate
+		self.zone_cache = {}
+
+	def bin_index(self, smin, smax, s0, ds):
+		i1 = np.clip(((smin - s0) // ds).astype(int), 0, self.nbins-1)
+		i2 = np.clip(((smax - s0) // ds).astype(int), 0, self.nbins-1)
+		return i1, i2
+
+	# zone id containing the point (first zone on overlaps), -1 outside
+	def zone(self, x, y):
+		key = (x, y)
+		zone_id = self.zone_cache.get(key)
+		if zone_id is None:
+			zone_id = self.locate(x, y)
+			self.zone_cache[key] = zone_id
+		return zone_id
+
+	def locate(self, x, y):
+		ix = int((x - self.x0) // self.dx)
+		iy = int((y - self.y0) // self.dy)
+		# points on the upper bounding box edge belong to the last bin
+		if ix == self.nbins: ix -= 1
+		if iy == self.nbins: iy -= 1
+		if not (0 <= ix < self.nbins and 0 <= iy < self.nbins):
+			return -1
+		for i in self.bins[iy][ix]:
+			xmin, xmax, ymin, ymax = self.zones[i]
+			if (xmin <= x <= xmax) and (ymin <= y <= ymax):
+				return i
+		return -1
+
+	# zone id and heat source at the point (0 outside the repository)
+	def heatsource(self, x, y, t):
+		zone_id = self.zone(x, y)
+		if zone_id < 0:
+			return zone_id, 0.0
+		return zone_id, self.sources[zone_id].radioactive_heatflux(t)
+
+	# zone ids of many points (mesh points do not move: compute once, index per t)
+	def zone_ids(self, x, y):
+		return np.array([self.zone(xi, yi) for xi, yi in zip(np.ravel(x).tolist(), np.ravel(y).tolist())], dtype=int)
+
+	# heat source of each zone, evaluated once per zone
+	# (trailing zero picked by zone id -1 outside)
+	def zone_values(self, t):
+		return np.array([source.radioactive_heatflux(t) for source in self.sources] + [0.0])
+
+	# vectorized over points
+	def heatsources(self, x, y, t):
+		zone_ids = self.zone_ids(x, y)
+		return zone_ids, self.zone_values(t)[zone_ids]
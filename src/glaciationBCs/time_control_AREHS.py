@@ -1,10 +1,48 @@
 # Physical units: kg, m, s, K
 
+import bisect
+import math
 import numpy as np
-import matplotlib.pyplot as plt
 
 from constants_AREHS import s_a
 
+# Multi-harmonic (orbital) climate forcing f(t) = sum_k A_k sin(2 pi t / P_k + phi_k),
+# harmonics given as [(A_k, P_k, phi_k), ...]. The sum is tabulated once on [t_S, t_E]
+# with the step h chosen such that the error of the linear table interpolation
+# h^2/8 max|f''| <= h^2/8 sum_k |A_k| (2 pi / P_k)^2 stays below tol.
+class harmonic_forcing():
+
+	def __init__(self, harmonics, t_S, t_E, tol=1e-3):
+		self.amplitudes = np.array([A for A, P, phi in harmonics], dtype=float)
+		self.frequencies = np.array([2*np.pi / P for A, P, phi in harmonics], dtype=float)
+		self.phases = np.array([phi for A, P, phi in harmonics], dtype=float)
+		curvature = np.sum(np.abs(self.amplitudes) * self.frequencies**2)
+		n = 2
+		if (curvature > 0.0) and (t_E > t_S):
+			n = max(n, int(math.ceil((t_E-t_S) / math.sqrt(8*tol/curvature))) + 1)
+		self.t_S = float(t_S)
+		self.t_E = float(t_E)
+		self.h = (t_E-t_S) / (n-1) if t_E > t_S else 1.0
+		self.f_table = self.evaluate(np.linspace(t_S, t_E, n)).tolist()
+		self.n = n
+
+	# direct evaluation of the sum (t scalar or array)
+	def evaluate(self, t):
+		f = np.zeros(np.shape(t))
+		for A, w, phi in zip(self.amplitudes, self.frequencies, self.phases):
+			f += A * np.sin(w*np.asarray(t) + phi)
+		return f
+
+	# table lookup (direct evaluation outside the tabulated range)
+	def value(self, t):
+		if not (self.t_S <= t <= self.t_E):
+			return float(self.evaluate(t))
+		s = (t - self.t_S) / self.h
+		i = min(int(s), self.n-2)
+		w = s - i
+		return self.f_table[i] + w * (self.f_table[i+1] - self.f_table[i])
+
+
 class time_control():
 	# class variables: owned by the class itself, static, shared by all class instances
 	# TODO remove initialization phase
@@ -26,62 +64,60 @@ class time_control():
     }
 	
 	# constructor
-	def __init__(self, t_, f_):
+	# piecewise linear function through the breakpoints (t_[i], f_[i]), any number of stages
+	# optional harmonics [(A_k, P_k, phi_k), ...] of a climate forcing modulating the function
+	# optional stage names {i: name} (default: the stages above, "stage i" for further stages)
+	def __init__(self, t_, f_, harmonics=None, stages=None):
 		# instance variables	
 		self.t_ = t_
 		self.f_ = f_
+		if stages is not None:
+			self.stages = stages
+		self.forcing = None
+		if harmonics:
+			self.forcing = harmonic_forcing(harmonics, t_[0], t_[-1])
+		# precomputed breakpoints and slopes per stage
+		self.t_points = np.asarray(t_, dtype=float)
+		self.f_points = np.asarray(f_, dtype=float)
+		self.t_list = self.t_points.tolist() # for bisect with scalar t
+		Dt = np.diff(self.t_points)
+		Df = np.diff(self.f_points)
+		self.slopes = np.divide(Df, Dt, out=np.zeros_like(Df), where=Dt>0)
+		self.f_list = self.f_points.tolist()
+		self.slope_list = self.slopes.tolist()
 
+	# value of the climate forcing at t (0 without forcing)
 	def time_modulation(self, t):
-		# TODO
-		return t
+		if self.forcing is None:
+			return 0.0
+		return self.forcing.value(t)
 
+	# stage i for t_[i-1] < t <= t_[i] (stage 0 for 0 < t <= t_[0])
 	def stage_control(self, t):
-		print("t = ", t)
-		if (     0.0 < t <= self.t_[0]):
-			return self.stages[0]
-		if (self.t_[0] < t <= self.t_[1]):
-			return self.stages[1]
-		if (self.t_[1] < t <= self.t_[2]):
-			return self.stages[2]
-		if (self.t_[2] < t <= self.t_[3]):
-			return self.stages[3]
-		if (self.t_[3] < t <= self.t_[4]):
-			return self.stages[4]
-		if (self.t_[4] < t <= self.t_[5]):
-			return self.stages[5]
-		if (self.t_[5] < t <= self.t_[6]):
-			return self.stages[6]
+		i = bisect.bisect_left(self.t_list, t)
+		if (0.0 < t) and (i < len(self.t_list)):
+			return self.stages.get(i, "stage %d" % i)
 		return "undefined stage"
 	
-	def linear_function(self, t, t_S, t_E, f_S, f_E):
-		if (f_E==f_S):
-			return f_S
-		else:
-			Df = f_E - f_S
-			Dt = t_E - t_S
-			return Df/Dt * (t-t_S) + f_S
-	
+	# stage lookup by binary search, t may be a scalar or an array
+	# (held constant before t_[0] and after the last breakpoint)
 	def function_value(self, t):
-		# TODO for loop over all stages
-		if (self.t_[0] <= t <= self.t_[1]):
-			return self.linear_function(t, self.t_[0], self.t_[1], self.f_[0], self.f_[1])
-		if (self.t_[1] <  t <= self.t_[2]):
-			return self.linear_function(t, self.t_[1], self.t_[2], self.f_[1], self.f_[2])
-		if (self.t_[2] <  t <= self.t_[3]):
-			return self.linear_function(t, self.t_[2], self.t_[3], self.f_[2], self.f_[3])
-		if (self.t_[3] <  t <= self.t_[4]):
-			return self.linear_function(t, self.t_[3], self.t_[4], self.f_[3], self.f_[4])
-		if (self.t_[4] <  t <= self.t_[5]):
-			return self.linear_function(t, self.t_[4], self.t_[5], self.f_[4], self.f_[5])
-		if (self.t_[5] <  t <= self.t_[6]):
-			return self.linear_function(t, self.t_[5], self.t_[6], self.f_[5], self.f_[6])
+		if isinstance(t, (np.ndarray, list, tuple)):
+			t = np.clip(np.asarray(t, dtype=float), self.t_points[0], self.t_points[-1])
+			i = np.clip(np.searchsorted(self.t_points, t, side='left') - 1, 0, len(self.t_points) - 2)
+			return self.f_points[i] + self.slopes[i] * (t - self.t_points[i])
+		t_list = self.t_list
+		if (t <= t_list[0]):
+			return self.f_list[0]
+		if (t >= t_list[-1]):
+			return self.f_list[-1]
+		i = bisect.bisect_left(t_list, t) - 1
+		return self.f_list[i] + self.slope_list[i] * (t - t_list[i])
 		
 	def plot_evolution(self):
-		tRange = np.linspace(self.t_[0],self.t_[6],20)
-		fRange = np.empty(shape=[0])
-		for t in tRange:
-			f = self.function_value(t)	
-			fRange = np.append(fRange,f)
+		import matplotlib.pyplot as plt
+		tRange = np.linspace(self.t_[0],self.t_[-1],20)
+		fRange = self.function_value(tRange)
 		fig,ax = plt.subplots()
 		ax.set_title('Temporal evolution')
 		ax.plot(tRange / s_a, fRange)
@@ -0,0 +1,73 @@
+# Offline export of a BC to a table replayed by the BC collections (see src/glaciationBCs/bctable.py)
+# nodes: text file with rows "node_id x y z" (OGS node ids), or "x y z" (replayed by coordinates)
+# Neumann BCs and source terms are called at integration points: export these for exact replay,
+# points not in the table are interpolated linearly between the two nearest table points
+# times in the time unit of the model (parameter set), --years converts years to seconds
+# usage: python tools/export_bc_table.py <module> <bc name> <nodes file> <prefix> --range t_start t_end n_times
+#    or: python tools/export_bc_table.py <module> <bc name> <nodes file> <prefix> --times <times file>
+# module: pythonBCsOGS | pythonBCsOGS_AREHS (run in the directory the module expects its data)
+
+import os
+import sys
+import types
+import argparse
+import importlib
+
+import numpy as np
+
+src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+s_a = 365.25*24*3600 # seconds per year
+
+# placeholder OpenGeoSys module outside an OGS run
+def opengeosys():
+	try:
+		import OpenGeoSys
+	except ImportError:
+		OpenGeoSys = types.ModuleType('OpenGeoSys')
+		OpenGeoSys.BoundaryCondition = type('BoundaryCondition', (), {})
+		OpenGeoSys.SourceTerm = type('SourceTerm', (), {})
+		sys.modules['OpenGeoSys'] = OpenGeoSys
+
+# the original BC object (not its replay)
+def original_bc(module, name):
+	if module == 'pythonBCsOGS':
+		bcs = importlib.import_module('glaciationBCs.pythonBCsOGS')
+		return bcs.bc_factories[name]()
+	# the AREHS collection uses flat imports from the package directory
+	bcs = importlib.import_module(module)
+	if name in bcs.replay_tables:
+		raise ValueError("%s is replayed from a table, remove it from replay_tables" % name)
+	return getattr(bcs, name)
+
+def read_nodes(filename):
+	nodes = np.loadtxt(filename, ndmin=2)
+	if nodes.shape[1] == 4:
+		return nodes[:, 1:], nodes[:, 0].astype(int)
+	return nodes, None
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Export a BC to a table for replay")
+	parser.add_argument('module', choices=['pythonBCsOGS', 'pythonBCsOGS_AREHS'])
+	parser.add_argument('bc')
+	parser.add_argument('nodes')
+	parser.add_argument('prefix')
+	grid = parser.add_mutually_exclusive_group(required=True)
+	grid.add_argument('--range', nargs=3, metavar=('T_START', 'T_END', 'N_TIMES'))
+	grid.add_argument('--times', metavar='FILE')
+	parser.add_argument('--years', action='store_true', help="times given in years, model runs in seconds")
+	args = parser.parse_args()
+	if args.times is not None:
+		times = np.loadtxt(args.times, ndmin=1)
+	else:
+		times = np.linspace(float(args.range[0]), float(args.range[1]), int(args.range[2]))
+	if args.years:
+		times = times * s_a
+	sys.path[:0] = [src, os.path.join(src, 'glaciationBCs')]
+	opengeosys()
+	from glaciationBCs import bctable as bct
+	coords, node_ids = read_nodes(args.nodes)
+	bc = original_bc(args.module, args.bc)
+	table = bct.export_table(bc, args.prefix, times, coords, node_ids)
+	print("%s: %d times x %d nodes -> %s_values.npy (%d inactive)" % (args.bc, table.shape[0], table.shape[1],
+		  args.prefix, int(np.isnan(table).sum())))
@@ -0,0 +1,48 @@
+# Startup benchmark: import time of the BC collections as every OGS process (MPI rank) pays it
+# each import runs in a fresh interpreter with a placeholder OpenGeoSys module
+# usage: python tools/startup_benchmark.py [repetitions]
+
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+
+src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# runs in the fresh interpreter, prints the measurement as json
+probe = """
+import sys, time, types, json, resource
+OpenGeoSys = types.ModuleType('OpenGeoSys')
+OpenGeoSys.BoundaryCondition = type('BoundaryCondition', (), {})
+OpenGeoSys.SourceTerm = type('SourceTerm', (), {})
+sys.modules['OpenGeoSys'] = OpenGeoSys
+sys.path[:0] = [%r, %r]
+t0 = time.perf_counter()
+import %s
+t1 = time.perf_counter()
+print(json.dumps({'import_ms': (t1-t0)*1e3,
+				  'maxrss_MB': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,
+				  'matplotlib': 'matplotlib' in sys.modules, 'pandas': 'pandas' in sys.modules}))
+"""
+
+# the AREHS collection uses flat imports from the package directory
+modules = ['glaciationBCs.pythonBCsOGS', 'pythonBCsOGS_AREHS']
+
+def measure(module, repetitions=5):
+	code = probe % (src, os.path.join(src, 'glaciationBCs'), module)
+	runs = []
+	for i in range(repetitions):
+		out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+		runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+	return {'import_ms': np.median([r['import_ms'] for r in runs]),
+			'maxrss_MB': np.median([r['maxrss_MB'] for r in runs]),
+			'matplotlib': runs[0]['matplotlib'], 'pandas': runs[0]['pandas']}
+
+if __name__ == "__main__":
+	repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+	print("%-28s %12s %12s %12s %8s" % ('module', 'import [ms]', 'maxrss [MB]', 'matplotlib', 'pandas'))
+	for module in modules:
+		r = measure(module, repetitions)
+		print("%-28s %12.1f %12.1f %12s %8s" % (module, r['import_ms'], r['maxrss_MB'], r['matplotlib'], r['pandas']))